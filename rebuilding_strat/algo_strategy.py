@@ -1,9 +1,9 @@
 import gamelib
+from gamelib.navigation import ArrayShortestPathFinder
 import random
 import math
 import warnings
 from sys import maxsize
-import json
 
 """
 Most of the algo code you write will be in this file unless you create new
@@ -34,7 +34,18 @@ class AlgoStrategy(gamelib.AlgoCore):
             end+=1
         
         self.opponent_build_stack = []
-        self.turn_death_list = []
+        # (unit type, x, y, upgraded) of every entry in opponent_build_stack
+        self.opponent_build_keys = set()
+        # The structures at the start of the last turn, to diff against
+        self.last_board = None
+        # (unit type, x, y) of the structures that died last turn
+        self.turn_death_list = set()
+        # Simulation and path damage results, reused on later turns while the structures do not change
+        self.transposition_cache = gamelib.TranspositionCache(4096)
+        # Shared by every turn so spawn paths are only searched again where the structures changed
+        self.path_finder = ArrayShortestPathFinder(cache_paths=True)
+        # on_action_frame only reads breaches and deaths, skip decoding frames without any
+        self.action_frame_events = ["breach", "death"]
         
         
 
@@ -66,7 +77,8 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = gamelib.GameState(self.config, turn_state, self.catalog)
+        game_state.set_path_finder(self.path_finder)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
         
@@ -74,12 +86,12 @@ class AlgoStrategy(gamelib.AlgoCore):
         preds = self._update_opponent_build_stack(game_state)
         
         if game_state.turn_number > 1:
-            sim = gamelib.Simulation(game_state)
+            sim = gamelib.Simulation(game_state, cache=self.transposition_cache)
             edges = game_state.game_map.get_edges()
             spawnable_edges = self.filter_blocked_locations(edges[2]+edges[3], game_state)
             # placing preds
             sim.place_predicted_units(preds)
-            location, structure_damage, damage_taken, damage_to_opponent = sim.best_attack_path(spawnable_edges, int(game_state.get_resources(0)[1]), self.config["unitInformation"][3]["shorthand"], 0)
+            location, structure_damage, damage_taken, damage_to_opponent = sim.best_attack_path(spawnable_edges, int(game_state.get_resources(0)[1]), self.config["unitInformation"][3]["shorthand"], 0, pool=self.worker_pool, budget=self.turn_budget)
             if self.to_attack(game_state,structure_damage,damage_to_opponent, int(game_state.get_resources(0)[1])):
                 # ADDS SUPPORT FOR OFFENSE
                 self.add_support(game_state, location)
@@ -279,11 +291,10 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def detect_enemy_unit(self, game_state, unit_type=None, valid_x = None, valid_y = None):
         total_units = 0
-        for location in game_state.game_map:
-            if game_state.contains_stationary_unit(location):
-                for unit in game_state.game_map[location]:
-                    if unit.player_index == 1 and (unit_type is None or unit.unit_type == unit_type) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
-                        total_units += 1
+        for cell in game_state.game_map.structure_cells(1, unit_type):
+            x, y = gamelib.board.CELLS[cell]
+            if (valid_x is None or x in valid_x) and (valid_y is None or y in valid_y):
+                total_units += 1
         return total_units
         
     def filter_blocked_locations(self, locations, game_state):
@@ -295,19 +306,39 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     
     def least_damage_spawn_location_enemy(self,game_state,location_options):
+        # The zobrist hash only covers structures, our mobile units also shoot at the enemy's
+        mobile_attackers = self.mobile_attackers(game_state, 1)
+        key = (game_state.zobrist.value(), "least_damage_spawn_location_enemy", tuple(map(tuple, location_options)),
+               tuple((unit.unit_type, unit.x, unit.y) for unit in mobile_attackers))
+        index = self.transposition_cache.get(key)
+        if index is None:
+            index = self._least_damage_spawn_index_enemy(game_state, location_options, mobile_attackers)
+            self.transposition_cache.put(key, index)
+        return location_options[index]
+
+    def _least_damage_spawn_index_enemy(self, game_state, location_options, mobile_attackers):
         damages = []
-        for location in location_options:
-            path = game_state.find_path_to_edge(location)
-            damage = 0
+        for path in game_state.find_paths_to_edge(location_options):
             if path:
-                for path_location in path:
-                    # Get number of ally turrets that can attack each location and multiply by turret damage
-                    damage += sum([unit.damage_i for unit in game_state.get_attackers(path_location, 1)])
-                    # damage += len(game_state.get_attackers(path_location, 1)) * gamelib.GameUnit(TURRET, game_state.config).damage_i
+                # Sum of the damage of ally turrets, and ally mobile units, that can attack each location on the path
+                damage = game_state.threat_map.get_path_damage(path, 1)
+                for unit in mobile_attackers:
+                    damage += unit.damage_i * sum(1 for x, y in path if math.sqrt((x - unit.x) ** 2 + (y - unit.y) ** 2) <= unit.attackRange)
                 damages.append(damage)
         
         # Now just return the location that takes the least damage
-        return location_options[damages.index(min(damages))]
+        return damages.index(min(damages))
+
+    def mobile_attackers(self, game_state, player_index):
+        """The mobile units on the board that attack units of player_index. 
+        game_state.threat_map only tracks structures, game_state.get_attackers counts these as well
+        """
+        attackers = []
+        for cell in range(gamelib.board.CELL_COUNT):
+            for unit in game_state.game_map.units_at_cell(cell):
+                if not unit.stationary and unit.player_index != player_index and unit.damage_i > 0:
+                    attackers.append(unit)
+        return attackers
 
 
     def on_action_frame(self, turn_string):
@@ -318,7 +349,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         Full doc on format of a game frame at in json-docs.html in the root of the Starterkit.
         """
         # Let's record at what position we get scored on
-        state = json.loads(turn_string)
+        state = gamelib.decode_message(turn_string)
         events = state["events"]
         breaches = events["breach"]
         for breach in breaches:
@@ -334,13 +365,13 @@ class AlgoStrategy(gamelib.AlgoCore):
         self.get_turn_death_list(turn_string)
 
     def get_turn_death_list(self, turn_string):
-        game_string = json.loads(turn_string)
+        game_string = gamelib.decode_message(turn_string)
         for d in game_string["events"]["death"]:    # check game string for death events
             loc = d[0]
             unittype = d[1]
             intentional_removal = d[-1]
-            if not intentional_removal and unittype < 3 and [unittype, loc] not in self.turn_death_list: # 0, 1, 2
-                self.turn_death_list.append([unittype, loc])
+            if not intentional_removal and unittype < 3: # 0, 1, 2
+                self.turn_death_list.add((unittype, loc[0], loc[1]))
 
 
     def _update_opponent_build_stack(self, game_state):
@@ -363,12 +394,18 @@ class AlgoStrategy(gamelib.AlgoCore):
         """
         
         # >>>> Updating Build Stack <<<<<
-        game_string = json.loads(game_state.serialized_string)
+        game_string = gamelib.decode_message(game_state.serialized_string)
 
         p2units = game_string["p2Units"]
+        # Only structures added since last turn can be missing from the stack
+        diff = gamelib.BoardDiff(self.last_board, game_state)
+        self.last_board = diff.board
+        new_locations = diff.added[1] | diff.upgraded[1]
         current_units_list = []
         for index_type, struct in enumerate(p2units[:3]):
             for s in struct:
+                if (s[0], s[1]) not in new_locations:
+                    continue
                 out = []
                 out.append(index_type) # 0=wall, 1=support, 2=turret
                 out.append([s[0], s[1]])
@@ -378,7 +415,9 @@ class AlgoStrategy(gamelib.AlgoCore):
                 current_units_list.append(out)
 
         for s in current_units_list:
-            if s not in self.opponent_build_stack:
+            key = (s[0], s[1][0], s[1][1], s[2])
+            if key not in self.opponent_build_keys:
+                self.opponent_build_keys.add(key)
                 self.opponent_build_stack.append(s)
 
         # >>>> Getting Turn Death Stack <<<<<
@@ -391,7 +430,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         for build in self.opponent_build_stack:
             
             # if [unittype, location] is in death stack, that will likely be placed!
-            if [build[0], build[1]] in self.turn_death_list:
+            if (build[0], build[1][0], build[1][1]) in self.turn_death_list:
                 cost = 0
 
                 if build[0] == 0:   # wall
@@ -413,12 +452,12 @@ class AlgoStrategy(gamelib.AlgoCore):
                 
                 resources_available -= cost # REMOVE cost from resources available
             
-                self.turn_death_list.remove([build[0], build[1]])
+                self.turn_death_list.discard((build[0], build[1][0], build[1][1]))
 
             if resources_available < 1 or not(self.turn_death_list):
                 break
         
-        self.turn_death_list = []
+        self.turn_death_list = set()
 
         return preds
 
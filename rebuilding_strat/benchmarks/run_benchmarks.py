@@ -0,0 +1,234 @@
+"""
+Microbenchmarks for the gamelib hot paths and for a full on_turn. \n
+
+Every benchmark runs on the recorded mid game and late game turns in data/turns.json, with the config in
+data/config.json, so nothing depends on the engine or the network. Each call is timed on its own, and the
+distribution of the call latencies is reported per benchmark and turn, in milliseconds.
+
+Usage, from any folder:
+    python run_benchmarks.py                              Benchmarks the algo this folder belongs to
+    python run_benchmarks.py --algo ../../ua_it_worksv4   Benchmarks other algo variants, each in a process of its own
+    python run_benchmarks.py --save baseline.json         Saves the results as a baseline
+    python run_benchmarks.py --compare baseline.json      Compares the medians with a baseline, and exits with 1
+                                                          if any is slower by more than --threshold
+
+Benchmarks that an algo's gamelib does not support, such as best_attack_path without a simulation module, are skipped.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, "data")
+
+
+def load_data():
+    with open(os.path.join(DATA, "config.json")) as f:
+        config = json.load(f)
+    with open(os.path.join(DATA, "turns.json")) as f:
+        turns = json.load(f)
+    return config, turns
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def spawn_locations(game_state):
+    edges = game_state.game_map.get_edges()
+    return [location for location in edges[2] + edges[3] if not game_state.contains_stationary_unit(location)]
+
+
+def structures(game_state):
+    return [unit for location in game_state.game_map for unit in game_state.game_map[location] if unit.stationary]
+
+
+def bench_game_state(gamelib, config, turn, repeat):
+    return [timed(gamelib.GameState, config, turn) for _ in range(repeat)]
+
+
+def bench_find_path_to_edge(gamelib, config, turn, repeat):
+    game_state = gamelib.GameState(config, turn)
+    return [timed(game_state.find_path_to_edge, location) for _ in range(repeat) for location in spawn_locations(game_state)]
+
+
+def bench_find_path_to_edge_array(gamelib, config, turn, repeat):
+    from gamelib.navigation import ArrayShortestPathFinder
+    game_state = gamelib.GameState(config, turn)
+    game_state.set_path_finder(ArrayShortestPathFinder())
+    return [timed(game_state.find_path_to_edge, location) for _ in range(repeat) for location in spawn_locations(game_state)]
+
+
+def bench_get_target(gamelib, config, turn, repeat):
+    game_state = gamelib.GameState(config, turn)
+    return [timed(game_state.get_target, unit) for _ in range(repeat) for unit in structures(game_state)]
+
+
+def bench_get_attackers(gamelib, config, turn, repeat):
+    game_state = gamelib.GameState(config, turn)
+    return [timed(game_state.get_attackers, location, 0) for _ in range(repeat) for location in game_state.game_map]
+
+
+def bench_get_locations_in_range(gamelib, config, turn, repeat):
+    game_map = gamelib.GameState(config, turn).game_map
+    return [timed(game_map.get_locations_in_range, location, 3.5) for _ in range(repeat) for location in game_map]
+
+
+def bench_best_attack_path(gamelib, config, turn, repeat):
+    from gamelib.simulation import Simulation
+    times = []
+    for _ in range(repeat):
+        game_state = gamelib.GameState(config, turn)
+        simulation = Simulation(game_state)
+        scout = config["unitInformation"][3]["shorthand"]
+        times.append(timed(simulation.best_attack_path, spawn_locations(game_state), int(game_state.get_resources(0)[1]), scout, 0))
+    return times
+
+
+def bench_on_turn(gamelib, config, turn, repeat):
+    import algo_strategy
+    times = []
+    for _ in range(repeat):
+        # A new algo each time, so nothing is reused from the previous call
+        algo = algo_strategy.AlgoStrategy()
+        algo.on_game_start(config)
+        random.seed(0)
+        times.append(timed(algo.on_turn, turn))
+    return times
+
+
+BENCHMARKS = [
+    ("GameState", bench_game_state),
+    ("find_path_to_edge", bench_find_path_to_edge),
+    ("find_path_to_edge[array]", bench_find_path_to_edge_array),
+    ("get_target", bench_get_target),
+    ("get_attackers", bench_get_attackers),
+    ("get_locations_in_range", bench_get_locations_in_range),
+    ("best_attack_path", bench_best_attack_path),
+    ("on_turn", bench_on_turn),
+]
+
+
+def summarize(times):
+    """The latency distribution of a list of call times, in milliseconds
+    """
+    times = sorted(t * 1000 for t in times)
+    return {
+        "calls": len(times),
+        "min": times[0],
+        "median": statistics.median(times),
+        "p90": times[min(len(times) - 1, int(len(times) * 0.9))],
+        "max": times[-1],
+        "mean": statistics.fmean(times),
+    }
+
+
+def run_worker(algo_dir, repeat, selected):
+    """Runs the benchmarks in this process against the algo in algo_dir, and prints the results as json
+    """
+    sys.path.insert(0, os.path.abspath(algo_dir))
+    import gamelib
+
+    config, turns = load_data()
+    variant = os.path.basename(os.path.abspath(algo_dir))
+    results = {}
+    for name, benchmark in BENCHMARKS:
+        if selected and name not in selected:
+            continue
+        for turn in turns:
+            key = "{}/{}/{}".format(variant, name, turn["name"])
+            quiet = io.StringIO()
+            try:
+                # The algos print their moves and debug output, keep it out of the results
+                with contextlib.redirect_stdout(quiet), contextlib.redirect_stderr(quiet):
+                    times = benchmark(gamelib, config, turn["turn"], repeat)
+            except Exception as error:
+                sys.stderr.write("Skipped {}: {!r}\n".format(key, error))
+                break
+            results[key] = summarize(times)
+    print(json.dumps(results))
+
+
+def run_algo(algo_dir, repeat, selected):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", algo_dir, "--repeat", str(repeat)]
+    for name in selected:
+        command += ["--only", name]
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    sys.stderr.write(process.stderr)
+    if process.returncode != 0:
+        sys.stderr.write("Benchmarks failed for {}\n".format(algo_dir))
+        return {}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def print_results(results):
+    print("{:<64} {:>6} {:>9} {:>9} {:>9} {:>9}".format("benchmark (ms)", "calls", "min", "median", "p90", "max"))
+    for key, stats in results.items():
+        print("{:<64} {:>6} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f}".format(
+            key, stats["calls"], stats["min"], stats["median"], stats["p90"], stats["max"]))
+
+
+def compare(results, baseline, threshold):
+    """Prints how each median changed since the baseline
+
+    Returns:
+        The keys of the benchmarks whose median is more than threshold times the baseline's
+
+    """
+    regressions = []
+    print("\n{:<64} {:>9} {:>9} {:>7}".format("compared to baseline (median ms)", "baseline", "now", "ratio"))
+    for key, stats in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]["median"]
+        ratio = stats["median"] / before if before > 0 else 1.0
+        flag = ""
+        if ratio > threshold:
+            regressions.append(key)
+            flag = "  SLOWER"
+        print("{:<64} {:>9.3f} {:>9.3f} {:>6.2f}x{}".format(key, before, stats["median"], ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks gamelib hot paths and on_turn on recorded turns")
+    parser.add_argument("--algo", action="append", help="An algo folder to benchmark, can be given more than once. Defaults to the algo holding this folder")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times each benchmark is run on each turn")
+    parser.add_argument("--only", action="append", default=[], help="Only run the named benchmark, can be given more than once")
+    parser.add_argument("--save", help="Save the results to this file")
+    parser.add_argument("--compare", help="Compare the results with a file saved by --save")
+    parser.add_argument("--threshold", type=float, default=1.25, help="The median slowdown counted as a regression by --compare")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.repeat, args.only)
+        return
+
+    results = {}
+    for algo_dir in args.algo or [os.path.dirname(HERE)]:
+        results.update(run_algo(algo_dir, args.repeat, args.only))
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\n{} benchmarks are slower than the baseline".format(len(regressions)))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
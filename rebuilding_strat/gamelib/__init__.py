@@ -4,6 +4,9 @@ The gamelib package contains modules that assist in algo creation \n
 The GameState class in game_state.py is the main class most players interact with. 
 It contains functions that let you get information about resources, deploy units, and help you strategize your move. \n
 
+The UnitCatalog class in catalog.py holds the unit types of a game config (their shorthands, type ids, stats and costs). 
+AlgoCore builds it once when the config arrives and passes it to every GameState, GameMap and GameUnit. \n
+
 The GameMap class in game_map.py represents the current game map. It can be used to access information related to the locations of units. 
 Investigating it is useful for any player that wants to access more information about the current state of the game. \n
 
@@ -16,15 +19,40 @@ Investigating it is useful for advanced players interested in getting data from
 The Navigation class in navigation.py contains functions related to path-finding, which are used by GameState in pathing related functions. 
 Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
 
-util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
+The ThreatMap class in threat_map.py tracks which structures attack each location. GameState keeps one in sync with its map, 
+which makes scoring the damage along a path a handful of lookups. \n
+
+The TurnBudget class in budget.py tracks how much thinking time is left in a turn. AlgoCore starts one as each turn arrives, 
+and long searches like Simulation.best_attack_path can check it to stop early with their best answer so far. \n
+
+The CombatSimulator class in combat.py plays out an action phase frame by frame, with every mobile unit of both players, 
+unit speeds, targeting, shielding, self destructs and breaches. Simulation(game_state, frame_accurate=True) uses it for simulate_path. \n
+
+The CompactBoard class in compact_board.py packs the structures of a GameMap into a single buffer, 
+for searches that need to copy boards cheaply or use them as dictionary keys. \n
+
+The BoardDiff class in board_diff.py lists the structures each player added, lost, upgraded or had damaged between two turns, 
+so strategies can follow what the opponent builds without comparing lists of units themselves. \n
+
+The ZobristHash class in zobrist.py keeps a hash of the structures on a map as they change, GameState keeps one as game_state.zobrist. 
+Together with a TranspositionCache kept across turns, it lets results computed on an unchanged board be reused. \n
+
+board.py holds the static geometry of the board (bounds, cell ids, neighbors and edges), computed once at import. \n
+
+util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write(), 
+and decode_message(), which gets the json of an engine message without decoding it a second time.
 """
 
 from .algocore import AlgoCore
-from .util import debug_write
+from .util import debug_write, decode_message
 from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
 from .simulation import Simulation
+from .budget import TurnBudget
+from .catalog import UnitCatalog
+from .zobrist import TranspositionCache
+from .board_diff import BoardDiff
 
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util", 'simulation']
+__all__ = ["algocore", "board", "board_diff", "budget", "catalog", "combat", "compact_board", "game_state", "game_map", "navigation", "parallel", "threat_map", "unit", "util", "zobrist", 'simulation']
  
\ No newline at end of file
@@ -1,7 +1,9 @@
-import json
+import time
 
+from .budget import TurnBudget
+from .catalog import UnitCatalog
 from .game_state import GameState
-from .util import get_command, debug_write, BANNER_TEXT, send_command
+from .util import get_command, debug_write, BANNER_TEXT, send_command, ParsedMessage, json_loads, peek_turn_type, has_events
 
 class AlgoCore(object):
     """
@@ -10,10 +12,24 @@ class AlgoCore(object):
 
     Attributes :
         * config (JSON): json object containing information about the game
+        * catalog (:obj: UnitCatalog): The unit types of the config, built when the config arrives, before on_game_start
+        * turn_budget (:obj: TurnBudget): The thinking time left in the current turn, reset when each turn arrives
+        * turn_time_fraction (float): The share of the engine's soft turn time limit that turn_budget allows
+        * action_frame_events (list): If set, only action frames with at least one event of these types, 
+          like ["breach", "death"], are passed to on_action_frame. The others are skipped without being decoded
+        * batch_action_frames (bool): If True, action frames are queued and passed to on_action_frame 
+          when the next turn arrives, just before on_turn, instead of as they arrive
 
     """
     def __init__(self):
         self.config = None
+        self.catalog = None
+        self.worker_pool = None
+        self.turn_budget = None
+        self.turn_time_fraction = 0.8
+        self.action_frame_events = None
+        self.batch_action_frames = False
+        self._pending_frames = []
 
     def on_game_start(self, config):
         """
@@ -23,10 +39,21 @@ class AlgoCore(object):
         """
         self.config = config
 
+    def start_worker_pool(self, processes=None):
+        """
+        Starts a SimulationPool of worker processes for parallel simulations, stored in self.worker_pool. 
+        Call it from on_game_start, after the config is set, so the workers are ready before the first turn.
+        The pool is stopped when the game ends.
+        """
+        from .parallel import SimulationPool
+        self.worker_pool = SimulationPool(self.config, processes)
+        return self.worker_pool
+
     def on_turn(self, game_state):
         """
         This step function is called at the start of each turn.
         It is passed the current game state, which can be used to initiate a new GameState object. 
+        The game state is a ParsedMessage, a string that also holds its decoded json, so GameState does not decode it again.
         By default, it sends empty commands to the game engine. \n
         algo_strategy.py inherits from AlgoCore and overrides this on turn function. 
         Adjusting the on_turn function in algo_strategy is the main way to adjust your algo's logic. 
@@ -40,10 +67,34 @@ class AlgoCore(object):
         The action phase is made up of a sequence of distinct frames. 
         Each of these frames is sent to the algo in order. 
         They can be handled in this function. 
+        Like in on_turn, the frame is a ParsedMessage, use decode_message to get its json without decoding it again.
         """
         pass
 
 
+    def flush_action_frames(self):
+        """
+        Passes the action frames queued while batch_action_frames is set to on_action_frame, oldest first.
+        AlgoCore calls it when a turn arrives, before on_turn.
+        """
+        frames, self._pending_frames = self._pending_frames, []
+        for frame in frames:
+            self.on_action_frame(ParsedMessage(frame))
+
+    def _defer_action_frame(self, message):
+        """
+        Skips or queues an action frame, according to action_frame_events and batch_action_frames, without decoding it.
+        Returns True if the frame was handled, False if it should be decoded and passed on now.
+        """
+        if (self.action_frame_events is None and not self.batch_action_frames) or peek_turn_type(message) != 1:
+            return False
+        if self.action_frame_events is not None and not has_events(message, self.action_frame_events):
+            return True
+        if self.batch_action_frames:
+            self._pending_frames.append(message)
+            return True
+        return False
+
     def start(self):
         """ 
         Start the parsing loop.
@@ -57,21 +108,32 @@ class AlgoCore(object):
             # Note: Python blocks and hangs on stdin. Can cause issues if connections aren't setup properly and may need to
             # manually kill this Python program.
             game_state_string = get_command()
+            received = time.time()
             if "replaySave" in game_state_string:
                 """
                 This means this must be the config file. So, load in the config file as a json and add it to your AlgoStrategy class.
                 """
-                parsed_config = json.loads(game_state_string)
+                parsed_config = json_loads(game_state_string)
+                self.catalog = UnitCatalog(parsed_config)
                 self.on_game_start(parsed_config)
             elif "turnInfo" in game_state_string:
-                state = json.loads(game_state_string)
+                if self._defer_action_frame(game_state_string):
+                    continue
+                # Decoded once here, on_turn and on_action_frame get the ParsedMessage
+                game_state_string = ParsedMessage(game_state_string)
+                state = game_state_string.state
                 stateType = int(state.get("turnInfo")[0])
                 if stateType == 0:
                     """
                     This is the game turn game state message. Algo must now print to stdout 2 lines, one for build phase one for
                     deploy phase. Printing is handled by the provided functions.
                     """
+                    self.turn_budget = TurnBudget.from_config(self.config, received, self.turn_time_fraction)
+                    self.flush_action_frames()
                     self.on_turn(game_state_string)
+                    if self.worker_pool is not None:
+                        # The turn is submitted, replace workers stopped during it
+                        self.worker_pool.revive()
                 elif stateType == 1:
                     """
                     If stateType == 1, this game_state_string string represents a single frame of an action phase
@@ -82,6 +144,8 @@ class AlgoCore(object):
                     This is the end game message. This means the game is over so break and finish the program.
                     """
                     debug_write("Got end state, game over. Stopping algo.")
+                    if self.worker_pool is not None:
+                        self.worker_pool.close()
                     break
                 else:
                     """
@@ -0,0 +1,159 @@
+"""
+Static geometry of the diamond shaped game board. \n
+
+Everything here only depends on the size of the arena, so it is computed once at import and
+shared by GameMap, GameState and the path finders. Lookups into these tables replace the
+bounds arithmetic and edge list building those classes used to redo on every call.
+
+Attributes :
+    * ARENA_SIZE (int): The size of the arena
+    * HALF_ARENA (int): Half the size of the arena
+    * TOP_RIGHT, TOP_LEFT, BOTTOM_LEFT, BOTTOM_RIGHT (int): The edge constants, same as on GameMap
+    * IN_BOUNDS (tuple): IN_BOUNDS[x][y] is True if [x, y] is on the board
+    * CELLS (tuple): Every (x, y) on the board, bottom row first, each row left to right. The index of a location in CELLS is its cell id
+    * CELL_COUNT (int): The number of locations on the board
+    * NEIGHBORS (tuple): NEIGHBORS[cell] holds the cell ids of the on-board neighbors of a cell, ordered up, down, right, left
+    * EDGES (tuple): The (x, y) locations along each edge, indexed by edge constant
+    * EDGE_SETS (tuple): The same locations as frozensets, for membership tests
+    * EDGE_OF (dict): Maps an (x, y) edge location to its edge constant
+    * EDGE_CELLS (tuple): The cell ids along each edge, in the same order as EDGES
+    * EDGE_CELL_SETS (tuple): The same cell ids as frozensets
+    * EDGE_MASKS (tuple): The same cell ids as int bitsets, bit n set for cell id n
+    * SIDE_MASKS (tuple): Per player_index, a bitset of the cells on that player's half of the board
+    * IDEALNESS (tuple): IDEALNESS[edge][cell] is how much a unit targeting edge wants to reach cell, see ShortestPathFinder._get_idealness
+
+Cell ids are the cheap way to work with locations in hot loops: they are plain ints, so they hash
+and compare without building lists, index flat arrays directly, and sets of them pack into int bitsets.
+Use cell_id and CELLS to convert, both are a single lookup.
+
+"""
+import sys
+
+ARENA_SIZE = 28
+HALF_ARENA = 14
+
+TOP_RIGHT = 0
+TOP_LEFT = 1
+BOTTOM_LEFT = 2
+BOTTOM_RIGHT = 3
+
+
+def _compute_in_bounds(x, y):
+    row_size = y + 1
+    startx = HALF_ARENA - row_size
+    endx = startx + (2 * row_size) - 1
+    top_half_check = (y < HALF_ARENA and x >= startx and x <= endx)
+
+    row_size = (ARENA_SIZE - 1 - y) + 1
+    startx = HALF_ARENA - row_size
+    endx = startx + (2 * row_size) - 1
+    bottom_half_check = (y >= HALF_ARENA and x >= startx and x <= endx)
+
+    return bottom_half_check or top_half_check
+
+
+# Only indexed with ints, other coordinates such as floats are checked with _compute_in_bounds
+IN_BOUNDS = tuple(tuple(_compute_in_bounds(x, y) for y in range(ARENA_SIZE)) for x in range(ARENA_SIZE))
+
+CELLS = tuple((x, y) for y in range(ARENA_SIZE) for x in range(ARENA_SIZE) if IN_BOUNDS[x][y])
+CELL_COUNT = len(CELLS)
+
+# Maps y * ARENA_SIZE + x to a cell id, or -1 if the location is off the board
+_CELL_ID = [-1] * (ARENA_SIZE * ARENA_SIZE)
+for _cell, (_x, _y) in enumerate(CELLS):
+    _CELL_ID[_y * ARENA_SIZE + _x] = _cell
+
+
+def in_arena_bounds(location):
+    """Checks if the given location is inside the diamond shaped game board.
+
+    Args:
+        location: A map location
+
+    Returns:
+        True if the location is on the board, False otherwise
+
+    """
+    x, y = location
+    if type(x) is not int or type(y) is not int:
+        return _compute_in_bounds(x, y)
+    return 0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE and IN_BOUNDS[x][y]
+
+
+def cell_id(x, y):
+    """Gets the cell id of a location
+
+    Returns:
+        The index of (x, y) in CELLS, or -1 if the location is off the board
+
+    """
+    if 0 <= x < ARENA_SIZE and 0 <= y < ARENA_SIZE:
+        return _CELL_ID[y * ARENA_SIZE + x]
+    return -1
+
+
+NEIGHBORS = tuple(
+    tuple(n for n in (cell_id(x, y + 1), cell_id(x, y - 1), cell_id(x + 1, y), cell_id(x - 1, y)) if n >= 0)
+    for x, y in CELLS
+)
+
+EDGES = (
+    tuple((HALF_ARENA + num, ARENA_SIZE - 1 - num) for num in range(HALF_ARENA)),
+    tuple((HALF_ARENA - 1 - num, ARENA_SIZE - 1 - num) for num in range(HALF_ARENA)),
+    tuple((HALF_ARENA - 1 - num, num) for num in range(HALF_ARENA)),
+    tuple((HALF_ARENA + num, num) for num in range(HALF_ARENA)),
+)
+EDGE_SETS = tuple(frozenset(edge) for edge in EDGES)
+EDGE_OF = {location: edge for edge, locations in enumerate(EDGES) for location in locations}
+
+EDGE_CELLS = tuple(tuple(cell_id(x, y) for x, y in edge) for edge in EDGES)
+EDGE_CELL_SETS = tuple(frozenset(edge) for edge in EDGE_CELLS)
+
+
+def cell_of(location):
+    """Gets the cell id of an [x, y] or (x, y) location, -1 if it is off the board
+    """
+    return cell_id(location[0], location[1])
+
+
+def cells_mask(cells):
+    """Packs cell ids into an int bitset, bit n set for cell id n
+    """
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+
+def mask_cells(mask):
+    """Unpacks an int bitset into a list of cell ids, in increasing order
+    """
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+def region_mask(min_x, max_x, min_y, max_y):
+    """Gets the bitset of the on-board cells with min_x <= x <= max_x and min_y <= y <= max_y
+    """
+    return cells_mask(cell for cell, (x, y) in enumerate(CELLS) if min_x <= x <= max_x and min_y <= y <= max_y)
+
+
+EDGE_MASKS = tuple(cells_mask(edge) for edge in EDGE_CELLS)
+SIDE_MASKS = (region_mask(0, ARENA_SIZE - 1, 0, HALF_ARENA - 1), region_mask(0, ARENA_SIZE - 1, HALF_ARENA, ARENA_SIZE - 1))
+
+
+def _idealness(cell, edge):
+    if cell in EDGE_CELL_SETS[edge]:
+        return sys.maxsize
+    x, y = CELLS[cell]
+    # Deeper into the target's half is better, then further towards the target's side
+    idealness = 28 * y if edge in (TOP_RIGHT, TOP_LEFT) else 28 * (27 - y)
+    idealness += x if edge in (TOP_RIGHT, BOTTOM_RIGHT) else 27 - x
+    return idealness
+
+
+IDEALNESS = tuple(tuple(_idealness(cell, edge) for cell in range(CELL_COUNT)) for edge in range(4))
@@ -0,0 +1,74 @@
+from . import board
+from .compact_board import CompactBoard
+
+
+class BoardDiff:
+    """What changed in the structures of each player between two turns
+
+    The boards are packed into CompactBoards and compared cell by cell, so a diff takes one pass
+    over the board however many structures there are. Keep the board of the diff, and pass it as
+    previous next turn, to pack each turn only once.
+
+    A structure counts as added when its location held no structure of the same player and type,
+    or held an upgraded one and this one is not, which means it was destroyed and rebuilt.
+    The structure it replaced, if any, counts as removed.
+
+    Attributes :
+        * board (:obj: CompactBoard): The structures of the current turn
+        * added (tuple): For each player_index, the set of (x, y) locations where that player has a new structure
+        * removed (tuple): For each player_index, the set of (x, y) locations where a structure of that player is gone
+        * upgraded (tuple): For each player_index, the set of (x, y) locations of structures upgraded since
+        * damaged (tuple): For each player_index, a dict mapping the (x, y) location of each structure that lost health to the health lost
+
+    """
+    def __init__(self, previous, current):
+        """Compares two turns
+
+        Args:
+            previous: The earlier turn, as a GameState, GameMap or CompactBoard. If None, every structure of current counts as added
+            current: The later turn, as a GameState, GameMap or CompactBoard
+
+        """
+        self.board = _as_board(current)
+        self.added = (set(), set())
+        self.removed = (set(), set())
+        self.upgraded = (set(), set())
+        self.damaged = ({}, {})
+        self._compare(CompactBoard() if previous is None else _as_board(previous), self.board)
+
+    def _compare(self, before, after):
+        if before.data == after.data:
+            return
+        owner_before, owner_after = before.owner, after.owner
+        type_before, type_after = before.unit_type, after.unit_type
+        upgraded_before, upgraded_after = before.upgraded, after.upgraded
+        health_before, health_after = before.health, after.health
+        cells = board.CELLS
+        for cell in range(board.CELL_COUNT):
+            previous_owner = owner_before[cell]
+            owner = owner_after[cell]
+            if not previous_owner and not owner:
+                continue
+            location = cells[cell]
+            if previous_owner != owner or type_before[cell] != type_after[cell] or upgraded_before[cell] > upgraded_after[cell]:
+                if previous_owner:
+                    self.removed[previous_owner - 1].add(location)
+                if owner:
+                    self.added[owner - 1].add(location)
+                continue
+            if upgraded_after[cell] > upgraded_before[cell]:
+                self.upgraded[owner - 1].add(location)
+            if health_after[cell] < health_before[cell]:
+                self.damaged[owner - 1][location] = health_before[cell] - health_after[cell]
+
+    def changed(self, player_index):
+        """Whether anything changed in the structures of a player
+        """
+        return bool(self.added[player_index] or self.removed[player_index]
+                    or self.upgraded[player_index] or self.damaged[player_index])
+
+
+def _as_board(turn):
+    if isinstance(turn, CompactBoard):
+        return turn
+    return CompactBoard.from_game_map(getattr(turn, "game_map", turn))
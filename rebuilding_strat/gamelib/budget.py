@@ -0,0 +1,46 @@
+import time
+
+
+class TurnBudget:
+    """Keeps track of how much of a turn's thinking time is left
+
+    AlgoCore creates one as soon as each turn string arrives and stores it in self.turn_budget
+    before calling on_turn. Long running searches should check expired() between units of work
+    and return the best result found so far once it is True.
+
+    Attributes :
+        * start (float): The time.time() at which the turn string arrived
+        * limit (float): The number of seconds the turn may use
+
+    """
+    def __init__(self, limit, start=None):
+        self.start = time.time() if start is None else start
+        self.limit = limit
+
+    @classmethod
+    def from_config(cls, config, start=None, fraction=0.8):
+        """Creates a budget using a fraction of the soft turn time limit from the game config
+
+        Args:
+            config: The game config
+            start: When the turn started, now if None
+            fraction: The share of the soft limit to allow, leaving the rest as a safety margin
+
+        """
+        soft_limit_ms = config.get("timingAndReplay", {}).get("waitTimeBotSoft", 5000)
+        return cls(fraction * soft_limit_ms / 1000, start)
+
+    def elapsed(self):
+        """Seconds since the turn started
+        """
+        return time.time() - self.start
+
+    def remaining(self):
+        """Seconds left in the budget, never negative
+        """
+        return max(0.0, self.limit - self.elapsed())
+
+    def expired(self):
+        """True once the budget is used up
+        """
+        return self.elapsed() >= self.limit
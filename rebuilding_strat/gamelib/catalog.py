@@ -0,0 +1,124 @@
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+
+class UnitStats(namedtuple("UnitStats", ["stationary", "speed", "damage_f", "damage_i", "attackRange", "shieldRange",
+                                         "max_health", "shieldPerUnit", "shieldBonusPerY", "cost"])):
+    """The stats every unit of one type, upgraded or not, shares. See GameUnit for the fields.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_config(cls, type_config):
+        return cls(type_config.get("unitCategory") == 0, type_config.get("speed", 0), type_config.get("attackDamageTower", 0),
+                   type_config.get("attackDamageWalker", 0), type_config.get("attackRange", 0), type_config.get("shieldRange", 0),
+                   type_config.get("startHealth", 0), type_config.get("shieldPerUnit", 0), type_config.get("shieldBonusPerY", 0),
+                   (type_config.get("cost1", 0), type_config.get("cost2", 0)))
+
+    def upgraded(self, upgrade_config):
+        """The stats after applying the upgrade section of a unit's config
+        """
+        return self._replace(
+            speed=upgrade_config.get("speed", self.speed),
+            damage_f=upgrade_config.get("attackDamageTower", self.damage_f),
+            damage_i=upgrade_config.get("attackDamageWalker", self.damage_i),
+            attackRange=upgrade_config.get("attackRange", self.attackRange),
+            shieldRange=upgrade_config.get("shieldRange", self.shieldRange),
+            max_health=upgrade_config.get("startHealth", self.max_health),
+            shieldPerUnit=upgrade_config.get("shieldPerUnit", self.shieldPerUnit),
+            shieldBonusPerY=upgrade_config.get("shieldBonusPerY", self.shieldBonusPerY),
+            cost=(upgrade_config.get("cost1", 0) + self.cost[0], upgrade_config.get("cost2", 0) + self.cost[1]))
+
+
+# Maps id(config) to (config, catalog) for the most recently used configs, see UnitCatalog.for_config.
+# Keeping the config alive means its id can not be reused by another config while it is cached
+_CATALOGS = OrderedDict()
+_MAX_CATALOGS = 8
+
+
+class UnitCatalog:
+    """The unit types of a game config, and everything derived from them, computed once
+
+    A catalog is read only, so one can be shared by every GameState, GameMap and GameUnit
+    built from the same config, including states that exist side by side during a search.
+    AlgoCore builds one when the config arrives and stores it in self.catalog. Pass it along,
+    classes that are not given a catalog get the one of their config from for_config.
+    Don't change a config once a catalog was made from it.
+
+    Attributes :
+        * config (JSON): The game config
+        * WALL, SUPPORT, TURRET, SCOUT, DEMOLISHER, INTERCEPTOR, REMOVE, UPGRADE (str): The shorthand of each unit type
+        * UNIT_TYPES (tuple): The shorthand of each type id, in config order
+        * UNIT_TYPE_TO_INDEX (dict): Maps a shorthand to its type id, the index of the unit in the config
+        * ALL_UNITS (tuple): The shorthands of the units that can be spawned
+        * STRUCTURE_TYPES (frozenset): The shorthands of the structures
+        * stats (dict): Maps (unit_type, upgraded) to the UnitStats of that type
+        * costs (dict): Maps a shorthand to its cost, (SP, MP)
+        * upgrade_costs (dict): Maps a shorthand that can be upgraded to the cost of the upgrade, (SP, MP)
+        * hit_radius (float): The getHitRadius added to every attack range
+        * max_attack_range (float): The longest attack range of any unit, upgraded or not
+
+    """
+    def __init__(self, config):
+        set_attribute = super().__setattr__
+        unit_information = config["unitInformation"]
+        unit_types = tuple(unit["shorthand"] for unit in unit_information)
+        for name, unit_type in zip(("WALL", "SUPPORT", "TURRET", "SCOUT", "DEMOLISHER", "INTERCEPTOR", "REMOVE", "UPGRADE"), unit_types):
+            set_attribute(name, unit_type)
+
+        stats = {}
+        costs = {}
+        upgrade_costs = {}
+        for type_config in unit_information:
+            unit_type = type_config["shorthand"]
+            base = UnitStats.from_config(type_config)
+            stats[unit_type, False] = base
+            stats[unit_type, True] = base.upgraded(type_config.get("upgrade", {}))
+            costs[unit_type] = base.cost
+            if type_config.get("upgrade") is not None:
+                upgrade = type_config["upgrade"]
+                upgrade_costs[unit_type] = (upgrade.get("cost1", base.cost[0]), upgrade.get("cost2", base.cost[1]))
+
+        set_attribute("config", config)
+        set_attribute("UNIT_TYPES", unit_types)
+        set_attribute("UNIT_TYPE_TO_INDEX", MappingProxyType({unit_type: index for index, unit_type in enumerate(unit_types)}))
+        set_attribute("ALL_UNITS", (self.SCOUT, self.DEMOLISHER, self.INTERCEPTOR, self.WALL, self.SUPPORT, self.TURRET))
+        set_attribute("STRUCTURE_TYPES", frozenset((self.WALL, self.SUPPORT, self.TURRET)))
+        set_attribute("stats", MappingProxyType(stats))
+        set_attribute("costs", MappingProxyType(costs))
+        set_attribute("upgrade_costs", MappingProxyType(upgrade_costs))
+        set_attribute("hit_radius", unit_information[0].get("getHitRadius", 0))
+        set_attribute("max_attack_range", max(unit_stats.attackRange for unit_stats in stats.values()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UnitCatalog is read only")
+
+    @classmethod
+    def for_config(cls, config):
+        """Gets the catalog of a config, building it the first time the config is seen.
+        Only the catalogs of the few most recently used configs are kept
+
+        Args:
+            config: The game config
+
+        Returns:
+            The UnitCatalog for config
+
+        """
+        entry = _CATALOGS.get(id(config))
+        if entry is None or entry[0] is not config:
+            entry = _CATALOGS[id(config)] = (config, cls(config))
+            if len(_CATALOGS) > _MAX_CATALOGS:
+                _CATALOGS.popitem(last=False)
+        _CATALOGS.move_to_end(id(config))
+        return entry[1]
+
+    def is_stationary(self, unit_type):
+        """
+            Args:
+                unit_type: A unit type
+
+            Returns:
+                Boolean, True if the unit is stationary, False otherwise.
+        """
+        return unit_type in self.STRUCTURE_TYPES
@@ -0,0 +1,315 @@
+import math
+
+from . import board
+from .navigation import ArrayShortestPathFinder
+from .unit import GameUnit
+
+
+class CombatSimulator:
+    """Simulates an action phase frame by frame
+
+    Unlike the per path step estimate in Simulation.simulate_path, every mobile unit of both
+    players is simulated on its own. Each frame runs the phases of the engine in order:
+
+        1. Supports shield friendly mobile units that came into range, once per support and unit
+        2. Mobile units whose move is due take one step along their current path. A unit with
+           nowhere left to go scores a breach if it is on its target edge, and self destructs otherwise
+        3. Every unit with a target attacks once, picked with the same priorities as GameState.get_target.
+           Mobile units attack first, in spawn order, then structures in cell order
+        4. Units with no health left are removed. Mobile units re-path around destroyed structures
+
+    The units are kept as parallel lists, one entry per unit (or per cell, for structures), rather
+    than GameUnit objects, and the GameState the simulator was made from is never modified.
+
+    Attributes :
+        * game_state (:obj: GameState): The board to simulate on
+        * max_frames (int): The simulation stops after this many frames even if units are still alive
+
+    """
+    def __init__(self, game_state, max_frames=1000):
+        self.game_state = game_state
+        self.game_map = game_state.game_map
+        self.max_frames = max_frames
+        self._type_configs = {unit["shorthand"]: unit for unit in game_state.config["unitInformation"] if "shorthand" in unit}
+        self._end_points = [self.game_map.get_edge_locations(edge) for edge in range(4)]
+
+        # Structures, indexed by cell id. An owner of -1 means the cell is empty
+        count = board.CELL_COUNT
+        self.s_owner = [-1] * count
+        self.s_type = [None] * count
+        self.s_health = [0.0] * count
+        self.s_damage_f = [0.0] * count
+        self.s_damage_i = [0.0] * count
+        self.s_range = [0.0] * count
+        self.s_shield = [0.0] * count
+        self.s_shield_range = [0.0] * count
+        self.blocked = bytearray(count)
+        self._attackers = []
+        self._supports = [[], []]
+        for cell, location in enumerate(board.CELLS):
+            for unit in self.game_map[location]:
+                if unit.stationary:
+                    self._add_structure(cell, unit)
+
+        # Mobile units, indexed in spawn order
+        self.m_type = []
+        self.m_player = []
+        self.m_cell = []
+        self.m_health = []
+        self.m_damage_f = []
+        self.m_damage_i = []
+        self.m_range = []
+        self.m_period = []
+        self.m_next_move = []
+        self.m_steps = []
+        self.m_direction = []
+        self.m_edge = []
+        self.m_alive = []
+        self.m_shielded = []
+        self._mobile_at = [[] for _ in range(count)]
+        self._finders = {}
+        self._damaged = set()
+        self.frame = 0
+
+    def _add_structure(self, cell, unit):
+        self.s_owner[cell] = unit.player_index
+        self.s_type[cell] = unit.unit_type
+        self.s_health[cell] = unit.health
+        self.s_damage_f[cell] = unit.damage_f
+        self.s_damage_i[cell] = unit.damage_i
+        self.s_range[cell] = unit.attackRange
+        self.blocked[cell] = 1
+        if unit.attackRange > 0 and unit.damage_f + unit.damage_i > 0:
+            self._attackers.append(cell)
+        if unit.shieldPerUnit > 0:
+            self.s_shield[cell] = unit.shield_amount()
+            self.s_shield_range[cell] = unit.shieldRange
+            self._supports[unit.player_index].append(cell)
+
+    def spawn(self, unit_type, location, player_index, num=1):
+        """Adds mobile units before the first frame
+
+        Args:
+            unit_type: The type of mobile unit
+            location: Where to spawn them, the target edge is the edge opposite the one they spawn on
+            player_index: The player controlling them, 0 for you 1 for the enemy
+            num: The number of units
+
+        Returns:
+            The number of units spawned, 0 if the location is off the board or blocked
+
+        """
+        cell = board.cell_id(location[0], location[1])
+        if cell < 0 or self.blocked[cell]:
+            return 0
+        unit = GameUnit(unit_type, self.game_state.config, player_index, None, location[0], location[1], self.game_state.catalog)
+        # A unit moves once every 1/speed frames, units without a speed never move
+        period = max(1, int(round(1 / unit.speed))) if unit.speed > 0 else self.max_frames + 1
+        edge = self.game_state.get_target_edge(location)
+        for _ in range(num):
+            self._mobile_at[cell].append(len(self.m_type))
+            self.m_type.append(unit_type)
+            self.m_player.append(player_index)
+            self.m_cell.append(cell)
+            self.m_health.append(unit.health)
+            self.m_damage_f.append(unit.damage_f)
+            self.m_damage_i.append(unit.damage_i)
+            self.m_range.append(unit.attackRange)
+            self.m_period.append(period)
+            self.m_next_move.append(period)
+            self.m_steps.append(0)
+            self.m_direction.append(0)
+            self.m_edge.append(edge)
+            self.m_alive.append(True)
+            self.m_shielded.append(set())
+        return num
+
+    def simulate(self, spawns=()):
+        """Runs the action phase until every mobile unit is gone, or max_frames is reached
+
+        Args:
+            spawns: A list of (unit_type, location, player_index, num) to spawn before the first frame
+
+        Returns:
+            A dict whose values are [player 0, player 1] pairs, except for 'frames':
+                * frames: The number of frames simulated
+                * breaches: The health damage dealt to the other player by units reaching their edge
+                * structure_damage: The damage dealt to the other player's structures
+                * damage_taken: The damage taken by the player's mobile units, less the shielding they received
+                * destroyed: The [unit_type, x, y] of each structure of the other player destroyed
+
+        """
+        for unit_type, location, player_index, num in spawns:
+            self.spawn(unit_type, location, player_index, num)
+
+        self.breaches = [0.0, 0.0]
+        self.structure_damage = [0.0, 0.0]
+        self.damage_taken = [0.0, 0.0]
+        self.destroyed = [[], []]
+        alive = [i for i, is_alive in enumerate(self.m_alive) if is_alive]
+        while alive and self.frame < self.max_frames:
+            self.frame += 1
+            self._shield(alive)
+            self._move(alive)
+            self._attack(alive)
+            alive = self._remove_dead(alive)
+
+        return {'frames': self.frame, 'breaches': self.breaches, 'structure_damage': self.structure_damage,
+                'damage_taken': self.damage_taken, 'destroyed': self.destroyed}
+
+    def _shield(self, alive):
+        s_owner = self.s_owner
+        for i in alive:
+            player = self.m_player[i]
+            supports = self._supports[player]
+            if not supports:
+                continue
+            shielded = self.m_shielded[i]
+            x, y = board.CELLS[self.m_cell[i]]
+            for cell in supports:
+                if cell in shielded or s_owner[cell] != player:
+                    continue
+                sx, sy = board.CELLS[cell]
+                if math.sqrt((x - sx) ** 2 + (y - sy) ** 2) <= self.s_shield_range[cell]:
+                    shielded.add(cell)
+                    self.m_health[i] += self.s_shield[cell]
+                    self.damage_taken[player] -= self.s_shield[cell]
+
+    def _finder(self, edge):
+        """A path finder holding the pathlengths to an edge on the current board, made on first use
+        """
+        finder = self._finders.get(edge)
+        if finder is None:
+            finder = self._finders[edge] = ArrayShortestPathFinder()
+            finder.initialize_map(self.game_state)
+            finder.blocked[:] = self.blocked
+        return finder
+
+    def _move(self, alive):
+        frame = self.frame
+        for i in alive:
+            if self.m_next_move[i] != frame or self.m_health[i] <= 0:
+                continue
+            self.m_next_move[i] += self.m_period[i]
+            edge = self.m_edge[i]
+            end_points = self._end_points[edge]
+            finder = self._finder(edge)
+            cell = self.m_cell[i]
+            next_cell = finder.next_step_cell(cell, self.m_direction[i], end_points)
+
+            if next_cell == cell:
+                self._mobile_at[cell].remove(i)
+                self.m_alive[i] = False
+                if board.CELLS[cell] in board.EDGE_SETS[edge]:
+                    self.breaches[self.m_player[i]] += self._type_configs[self.m_type[i]].get("playerBreachDamage", 1)
+                else:
+                    self._self_destruct(i)
+                continue
+
+            self.m_direction[i] = finder.VERTICAL if board.CELLS[cell][0] == board.CELLS[next_cell][0] else finder.HORIZONTAL
+            self._mobile_at[cell].remove(i)
+            self._mobile_at[next_cell].append(i)
+            self.m_cell[i] = next_cell
+            self.m_steps[i] += 1
+
+    def _self_destruct(self, i):
+        type_config = self._type_configs[self.m_type[i]]
+        if self.m_steps[i] < type_config.get("selfDestructStepsRequired", 5):
+            return
+        player = self.m_player[i]
+        damage_f = type_config.get("selfDestructDamageTower", 0)
+        damage_i = type_config.get("selfDestructDamageWalker", 0)
+        for cell in self.game_map.get_cells_in_range(self.m_cell[i], type_config.get("selfDestructRange", 0)):
+            if self.s_owner[cell] == 1 - player:
+                self._damage_structure(player, cell, damage_f)
+            for target in self._mobile_at[cell]:
+                if self.m_player[target] != player:
+                    self._damage_mobile(target, damage_i)
+
+    def _attack(self, alive):
+        for i in alive:
+            if not self.m_alive[i] or self.m_health[i] <= 0 or self.m_range[i] <= 0:
+                continue
+            self._fire(self.m_player[i], self.m_cell[i], self.m_range[i], self.m_damage_f[i], self.m_damage_i[i])
+        for cell in self._attackers:
+            if self.s_owner[cell] >= 0 and self.s_health[cell] > 0:
+                self._fire(self.s_owner[cell], cell, self.s_range[cell], self.s_damage_f[cell], self.s_damage_i[cell])
+
+    def _fire(self, player, cell, attack_range, damage_f, damage_i):
+        """Picks the target of a unit and damages it
+
+        The priorities are the ones GameState.get_target uses: mobile units over structures, then
+        the nearest, the lowest health, the closest to the attacker's edge, and the furthest from the
+        center column. Candidates are compared in the same order, so ties go the same way.
+
+        """
+        x, y = board.CELLS[cell]
+        cells = board.CELLS
+        s_owner = self.s_owner
+        s_health = self.s_health
+        m_health = self.m_health
+        m_player = self.m_player
+        y_sign = 1 if player == 0 else -1
+        best = None
+        best_key = None
+        for target_cell in self.game_map.get_cells_in_range(cell, attack_range):
+            tx, ty = cells[target_cell]
+            if damage_f > 0 and s_owner[target_cell] == 1 - player and s_health[target_cell] > 0:
+                key = (1, math.sqrt((tx - x) ** 2 + (ty - y) ** 2), s_health[target_cell], y_sign * ty, -abs(board.HALF_ARENA - 0.5 - tx))
+                if best_key is None or key < best_key:
+                    best, best_key = (True, target_cell), key
+            if damage_i > 0:
+                for target in self._mobile_at[target_cell]:
+                    if m_player[target] == player or m_health[target] <= 0:
+                        continue
+                    key = (0, math.sqrt((tx - x) ** 2 + (ty - y) ** 2), m_health[target], y_sign * ty, -abs(board.HALF_ARENA - 0.5 - tx))
+                    if best_key is None or key < best_key:
+                        best, best_key = (False, target), key
+
+        if best is None:
+            return
+        stationary, target = best
+        if stationary:
+            self._damage_structure(player, target, damage_f)
+        else:
+            self._damage_mobile(target, damage_i)
+
+    def _damage_structure(self, player, cell, damage):
+        dealt = min(damage, self.s_health[cell])
+        if dealt <= 0:
+            return
+        self.s_health[cell] -= dealt
+        self.structure_damage[player] += dealt
+        self._damaged.add(cell)
+
+    def _damage_mobile(self, i, damage):
+        dealt = min(damage, self.m_health[i])
+        if dealt <= 0:
+            return
+        self.m_health[i] -= dealt
+        self.damage_taken[self.m_player[i]] += dealt
+
+    def _remove_dead(self, alive):
+        survivors = []
+        for i in alive:
+            if not self.m_alive[i]:
+                continue
+            if self.m_health[i] <= 0:
+                self.m_alive[i] = False
+                self._mobile_at[self.m_cell[i]].remove(i)
+                continue
+            survivors.append(i)
+
+        destroyed = False
+        for cell in sorted(self._damaged):
+            if self.s_owner[cell] >= 0 and self.s_health[cell] <= 0:
+                x, y = board.CELLS[cell]
+                self.destroyed[1 - self.s_owner[cell]].append([self.s_type[cell], x, y])
+                self.s_owner[cell] = -1
+                self.blocked[cell] = 0
+                destroyed = True
+        self._damaged.clear()
+        if destroyed:
+            # Paths are recomputed around the new board the next time a unit moves
+            self._finders = {}
+        return survivors
@@ -0,0 +1,123 @@
+from . import board
+from .catalog import UnitCatalog
+from .game_map import GameMap
+
+_COUNT = board.CELL_COUNT
+# Byte offsets of each field in CompactBoard.data. Health is kept 8 byte aligned so it can be viewed as doubles
+_OWNER = 0
+_TYPE = _COUNT
+_UPGRADED = 2 * _COUNT
+_HEALTH = -(-3 * _COUNT // 8) * 8
+_SIZE = _HEALTH + 8 * _COUNT
+
+
+class CompactBoard:
+    """The structures on a board, packed into one fixed size buffer
+
+    Each of the board's cells, in cell id order (see board.CELLS), has an owner, a structure type id,
+    a health and an upgraded flag. Everything lives in the single bytearray data, so copying a board
+    is one buffer copy, and boards compare and hash by content, which lets them be used as dictionary keys.
+    Don't change a board while it is used as a key.
+    Mobile units and pending removals are not stored.
+
+    Attributes :
+        * data (bytearray): The packed board
+        * owner (memoryview): Per cell, 0 if the cell is empty, otherwise 1 + the player_index of the structure
+        * unit_type (memoryview): Per cell, the type id of the structure, its index in the config's unitInformation
+        * upgraded (memoryview): Per cell, 1 if the structure is upgraded
+        * health (memoryview): Per cell, the health of the structure, as a double
+
+    """
+    __slots__ = ("data", "owner", "unit_type", "upgraded", "health")
+
+    def __init__(self, data=None):
+        """Creates an empty board, or a board over a copy of data from another CompactBoard
+        """
+        self.data = bytearray(_SIZE) if data is None else bytearray(data)
+        view = memoryview(self.data)
+        self.owner = view[_OWNER:_TYPE]
+        self.unit_type = view[_TYPE:_UPGRADED]
+        self.upgraded = view[_UPGRADED:_UPGRADED + _COUNT]
+        self.health = view[_HEALTH:].cast('d')
+
+    @classmethod
+    def from_game_map(cls, game_map):
+        """Packs the structures of a GameMap
+
+        Args:
+            game_map: The GameMap to pack
+
+        Returns:
+            A new CompactBoard
+
+        """
+        compact = cls()
+        type_ids = game_map.catalog.UNIT_TYPE_TO_INDEX
+        for cell, location in enumerate(board.CELLS):
+            for unit in game_map[location]:
+                if unit.stationary:
+                    compact.place(cell, unit.player_index, type_ids[unit.unit_type], unit.health, unit.upgraded)
+                    break
+        return compact
+
+    def to_game_map(self, config, catalog=None):
+        """Builds a GameMap holding the structures of this board
+
+        Args:
+            config: The game config
+            catalog: The UnitCatalog of the config, looked up from the config if not given
+
+        Returns:
+            A new GameMap
+
+        """
+        if catalog is None:
+            catalog = UnitCatalog.for_config(config)
+        game_map = GameMap(config, catalog)
+        owner = self.owner
+        for cell, location in enumerate(board.CELLS):
+            if owner[cell]:
+                game_map.add_unit(catalog.UNIT_TYPES[self.unit_type[cell]], location, owner[cell] - 1)
+                if self.upgraded[cell]:
+                    game_map.upgrade_unit(location)
+                game_map[location][0].health = self.health[cell]
+        return game_map
+
+    def place(self, cell, player_index, type_id, health, upgraded=False):
+        """Puts a structure on a cell, replacing anything already there
+        """
+        self.owner[cell] = player_index + 1
+        self.unit_type[cell] = type_id
+        self.upgraded[cell] = 1 if upgraded else 0
+        self.health[cell] = health
+
+    def clear(self, cell):
+        """Empties a cell
+        """
+        self.owner[cell] = 0
+        self.unit_type[cell] = 0
+        self.upgraded[cell] = 0
+        self.health[cell] = 0.0
+
+    def get(self, location):
+        """Gets the structure at a location
+
+        Returns:
+            (player_index, type_id, health, upgraded), or None if there is no structure there
+
+        """
+        cell = board.cell_id(location[0], location[1])
+        if cell < 0 or not self.owner[cell]:
+            return None
+        return (self.owner[cell] - 1, self.unit_type[cell], self.health[cell], bool(self.upgraded[cell]))
+
+    def copy(self):
+        return CompactBoard(self.data)
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactBoard):
+            return NotImplemented
+        return self.data == other.data
+
+    def __hash__(self):
+        return hash(bytes(self.data))
@@ -1,7 +1,32 @@
+import copy
 import math
+from . import board
+from .catalog import UnitCatalog
 from .unit import GameUnit
 from .util import debug_write
 
+# Offsets within range keyed by (radius, getHitRadius), and per cell lists of locations, or of cell ids, in range
+_RANGE_STENCILS = {}
+_RANGE_CELLS = {}
+_RANGE_CELL_IDS = {}
+
+
+def _range_stencil(radius, hit_radius):
+    """Gets the (dx, dy) offsets of all locations within range of a center, in search order
+    """
+    key = (radius, hit_radius)
+    stencil = _RANGE_STENCILS.get(key)
+    if stencil is None:
+        search_radius = math.ceil(radius)
+        # A unit with a given range affects all locations whose centers are within that range + get hit radius
+        stencil = _RANGE_STENCILS[key] = tuple(
+            (dx, dy)
+            for dx in range(-search_radius, search_radius + 1)
+            for dy in range(-search_radius, search_radius + 1)
+            if math.sqrt(dx ** 2 + dy ** 2) < radius + hit_radius)
+    return stencil
+
+
 class GameMap:
     """Holds data about the current game map and provides functions
     useful for getting information related to the map.
@@ -9,8 +34,13 @@ class GameMap:
     game_map[x, y] will return a list of Units located at that location, 
     or an empty list if there are no units at the location
 
+    The map also keeps an index of its structures by player and type, built on first use by 
+    structure_cells, structures or blocked_mask, then kept up to date by add_unit and remove_unit.
+    Like ThreatMap, it does not see structures added by appending to game_map[x, y] once it is built.
+
     Attributes :
         * config (JSON): Contains information about the current game rules
+        * catalog (:obj: UnitCatalog): The unit types of the config
         * enable_warnings (bool): If true, debug messages for game_map functions will print out
         * ARENA_SIZE (int): The size of the arena.
         * HALF_ARENA (int): Half of the size of the arena.
@@ -20,23 +50,29 @@ class GameMap:
         * BOTTOM_RIGHT (int): A constant that represents the bottom right edge
 
     """
-    def __init__(self, config):
+    def __init__(self, config, catalog=None):
         """Initializes constants and game map
 
         Args:
             config (JSON): Contains information about the game
+            catalog (:obj: UnitCatalog): The unit types of the config, looked up from the config if not given
 
         """
         self.config = config
+        self.catalog = catalog if catalog is not None else UnitCatalog.for_config(config)
         self.enable_warnings = True
-        self.ARENA_SIZE = 28
-        self.HALF_ARENA = int(self.ARENA_SIZE / 2)
-        self.TOP_RIGHT = 0
-        self.TOP_LEFT = 1
-        self.BOTTOM_LEFT = 2
-        self.BOTTOM_RIGHT = 3
+        self.ARENA_SIZE = board.ARENA_SIZE
+        self.HALF_ARENA = board.HALF_ARENA
+        self.TOP_RIGHT = board.TOP_RIGHT
+        self.TOP_LEFT = board.TOP_LEFT
+        self.BOTTOM_LEFT = board.BOTTOM_LEFT
+        self.BOTTOM_RIGHT = board.BOTTOM_RIGHT
         self.__map = self.__empty_grid()
         self.__start = [13,0]
+        self._structure_listeners = []
+        self._index_built = False
+        self._structure_index = {}
+        self._blocked_mask = 0
     
     def __getitem__(self, location):
         if len(location) == 2 and self.in_arena_bounds(location):
@@ -46,7 +82,14 @@ class GameMap:
 
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
-            self.__map[location[0]][location[1]] = val
+            x, y = location
+            self.__notify_removed(self.__map[x][y])
+            self.__map[x][y] = val
+            for unit in val:
+                if unit.stationary:
+                    # Structures are tracked by their position, so it has to be this location
+                    unit.x, unit.y = x, y
+                    self.__notify_added(unit)
             return
         self._invalid_coordinates(location)
 
@@ -75,6 +118,19 @@ class GameMap:
                 grid[x].append([])
         return grid
 
+    def units_at_cell(self, cell):
+        """Gets the list of units at a cell id, like game_map[x, y] but without the bounds check
+
+        Args:
+            cell: A cell id, see board.CELLS
+
+        Returns:
+            The list of units at the cell
+
+        """
+        x, y = board.CELLS[cell]
+        return self.__map[x][y]
+
     def _invalid_coordinates(self, location):
         self.warn("{} is out of bounds.".format(str(location)))
 
@@ -89,19 +145,9 @@ class GameMap:
         
         """
         x, y = location
-        half_board = self.HALF_ARENA
-
-        row_size = y + 1
-        startx = half_board - row_size
-        endx = startx + (2 * row_size) - 1
-        top_half_check = (y < self.HALF_ARENA and x >= startx and x <= endx)
-
-        row_size = (self.ARENA_SIZE - 1 - y) + 1
-        startx = half_board - row_size
-        endx = startx + (2 * row_size) - 1
-        bottom_half_check = (y >= self.HALF_ARENA and x >= startx and x <= endx)
-
-        return bottom_half_check or top_half_check
+        if type(x) is not int or type(y) is not int:
+            return board.in_arena_bounds(location)
+        return 0 <= x < board.ARENA_SIZE and 0 <= y < board.ARENA_SIZE and board.IN_BOUNDS[x][y]
 
     def get_edge_locations(self, quadrant_description):
         """Takes in an edge description and returns a list of locations.
@@ -127,27 +173,12 @@ class GameMap:
             A list with four lists inside of it of locations corresponding to the four edges.
             [0] = top_right, [1] = top_left, [2] = bottom_left, [3] = bottom_right.
         """
-        top_right = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA + num
-            y = self.ARENA_SIZE - 1 - num
-            top_right.append([int(x), int(y)])
-        top_left = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA - 1 - num
-            y = self.ARENA_SIZE - 1 - num
-            top_left.append([int(x), int(y)])
-        bottom_left = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA - 1 - num
-            y = num
-            bottom_left.append([int(x), int(y)])
-        bottom_right = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA + num
-            y = num
-            bottom_right.append([int(x), int(y)])
-        return [top_right, top_left, bottom_left, bottom_right]
+        return [[[x, y] for x, y in edge] for edge in board.EDGES]
+
+    def get_edge_cells(self, quadrant_description):
+        """Like get_edge_locations, but returns the cell ids along the edge, as a shared tuple
+        """
+        return board.EDGE_CELLS[quadrant_description]
     
     def add_unit(self, unit_type, location, player_index=0):
         """Add a single GameUnit to the map at the given location.
@@ -167,11 +198,33 @@ class GameMap:
             self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
 
         x, y = location
-        new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
+        new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1], self.catalog)
         if not new_unit.stationary:
             self.__map[x][y].append(new_unit)
         else:
+            self.__notify_removed(self.__map[x][y])
             self.__map[x][y] = [new_unit]
+            self.__notify_added(new_unit)
+
+    def add_units(self, unit_type, location, player_index=0, num=1):
+        """Add num GameUnits of the same type to the map at the given location.
+        Same as calling add_unit num times, but the stats are only looked up once, 
+        the other units are copies of the first.
+
+        Args:
+            unit_type: The type of the new units
+            location: A list of two integers representing the [x,y] coordinate of the new units
+            player_index: The index corresponding to the player controlling the new units, 0 for you 1 for the enemy
+            num: The number of units to add
+        """
+        if num < 1:
+            return
+        self.add_unit(unit_type, location, player_index)
+        units = self.__map[location[0]][location[1]]
+        if units[-1].stationary:
+            return
+        first = units[-1]
+        units.extend(copy.copy(first) for _ in range(num - 1))
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -186,8 +239,112 @@ class GameMap:
             self._invalid_coordinates(location)
         
         x, y = location
+        self.__notify_removed(self.__map[x][y])
         self.__map[x][y] = []
 
+    def upgrade_unit(self, location):
+        """Upgrade the structure at the given location.
+
+        Args:
+            location: The location of the structure to upgrade
+
+        Returns:
+            The upgraded unit, or None if there is no structure at the location
+
+        Like add_unit, this only changes the data stored in GameMap. Prefer it over calling upgrade() on the 
+        unit directly, so that anything tracking structures on this map sees the new stats.
+        """
+        for unit in self[location] or []:
+            if unit.stationary:
+                for listener in self._structure_listeners:
+                    listener.structure_removed(unit)
+                unit.upgrade()
+                for listener in self._structure_listeners:
+                    listener.structure_added(unit)
+                return unit
+
+    def add_structure_listener(self, listener):
+        """Register an object to be told about structure changes made through this map.
+
+        Args:
+            listener: An object with structure_added(unit) and structure_removed(unit) methods
+        """
+        self._structure_listeners.append(listener)
+
+    def __notify_added(self, unit):
+        if self._index_built:
+            self._index_add(board.cell_id(unit.x, unit.y), unit)
+        for listener in self._structure_listeners:
+            listener.structure_added(unit)
+
+    def __notify_removed(self, units):
+        for unit in units:
+            if unit.stationary:
+                if self._index_built:
+                    self._index_remove(board.cell_id(unit.x, unit.y), unit)
+                for listener in self._structure_listeners:
+                    listener.structure_removed(unit)
+
+    def _build_index(self):
+        if self._index_built:
+            return
+        self._index_built = True
+        self._structure_index = {}
+        self._blocked_mask = 0
+        for cell, (x, y) in enumerate(board.CELLS):
+            for unit in self.__map[x][y]:
+                if unit.stationary:
+                    self._index_add(cell, unit)
+                    break
+
+    def _index_add(self, cell, unit):
+        self._structure_index.setdefault((unit.player_index, unit.unit_type), set()).add(cell)
+        self._blocked_mask |= 1 << cell
+
+    def _index_remove(self, cell, unit):
+        self._structure_index.get((unit.player_index, unit.unit_type), set()).discard(cell)
+        self._blocked_mask &= ~(1 << cell)
+
+    def structure_cells(self, player_index, unit_type=None, region=None):
+        """Gets the cell ids of a player's structures, in time proportional to their number rather than the board
+
+        Args:
+            player_index: The index corresponding to the player controlling the structures, 0 for you 1 for the enemy
+            unit_type: Only count structures of this type. Any type if None
+            region: Only count structures in this int bitset of cells, like the ones made by board.region_mask. The whole board if None
+
+        Returns:
+            A list of cell ids, in increasing order, which is also the order of iterating over the map
+
+        """
+        self._build_index()
+        if unit_type is None:
+            cells = [cell for (player, _), type_cells in self._structure_index.items() if player == player_index for cell in type_cells]
+        else:
+            cells = list(self._structure_index.get((player_index, unit_type), ()))
+        if region is not None:
+            cells = [cell for cell in cells if region >> cell & 1]
+        cells.sort()
+        return cells
+
+    def structures(self, player_index, unit_type=None, region=None):
+        """Like structure_cells, but returns the structures themselves
+        """
+        units = []
+        for cell in self.structure_cells(player_index, unit_type, region):
+            x, y = board.CELLS[cell]
+            for unit in self.__map[x][y]:
+                if unit.stationary:
+                    units.append(unit)
+                    break
+        return units
+
+    def blocked_mask(self):
+        """Gets the cells holding a structure of either player, as an int bitset with bit n set for cell id n
+        """
+        self._build_index()
+        return self._blocked_mask
+
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
 
@@ -204,17 +361,44 @@ class GameMap:
         if not self.in_arena_bounds(location):
             self._invalid_coordinates(location)
 
+        getHitRadius = self.catalog.hit_radius
         x, y = location
-        locations = []
-        search_radius = math.ceil(radius)
-        getHitRadius = self.config["unitInformation"][0]['getHitRadius']
-        for i in range(int(x - search_radius), int(x + search_radius + 1)):
-            for j in range(int(y - search_radius), int(y + search_radius + 1)):
-                new_location = [i, j]
-                # A unit with a given range affects all locations whose centers are within that range + get hit radius
-                if self.in_arena_bounds(new_location) and self.distance_between_locations(location, new_location) < radius + getHitRadius:
-                    locations.append(new_location)
-        return locations
+        cell = board.cell_id(x, y) if type(x) is int and type(y) is int else -1
+        if cell < 0:
+            return [[x + dx, y + dy] for dx, dy in _range_stencil(radius, getHitRadius) if self.in_arena_bounds([x + dx, y + dy])]
+
+        key = (radius, getHitRadius)
+        cached = _RANGE_CELLS.get(key)
+        if cached is None:
+            cached = _RANGE_CELLS[key] = [None] * board.CELL_COUNT
+        locations = cached[cell]
+        if locations is None:
+            locations = cached[cell] = tuple((x + dx, y + dy) for dx, dy in _range_stencil(radius, getHitRadius) if self.in_arena_bounds([x + dx, y + dy]))
+        # The cached tuples are shared by every map, callers get lists of their own
+        return [[location_x, location_y] for location_x, location_y in locations]
+
+    def get_cells_in_range(self, cell, radius):
+        """Like get_locations_in_range, but takes and returns cell ids
+
+        Args:
+            cell: The cell id of the center of our search area
+            radius: The radius of our search area
+
+        Returns:
+            A tuple of the cell ids within our search area, in the same order as get_locations_in_range.
+            The tuple is shared between calls, don't change it.
+
+        """
+        key = (radius, self.catalog.hit_radius)
+        cached = _RANGE_CELL_IDS.get(key)
+        if cached is None:
+            cached = _RANGE_CELL_IDS[key] = [None] * board.CELL_COUNT
+        cells = cached[cell]
+        if cells is None:
+            x, y = board.CELLS[cell]
+            cells = cached[cell] = tuple(
+                in_range for in_range in (board.cell_id(x + dx, y + dy) for dx, dy in _range_stencil(*key)) if in_range >= 0)
+        return cells
 
     def distance_between_locations(self, location_1, location_2):
         """Euclidean distance
@@ -232,6 +416,28 @@ class GameMap:
 
         return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
 
+    def copy(self):
+        """Creates an independent copy of this map.
+
+        Every unit is copied, so changing units on the copy does not affect this map.
+        Structure listeners are not carried over.
+
+        Returns:
+            A new GameMap with the same units
+        """
+        new_map = GameMap(self.config, self.catalog)
+        new_map.enable_warnings = self.enable_warnings
+        new_grid = new_map.__map
+        for x, y in board.CELLS:
+            units = self.__map[x][y]
+            if units:
+                new_grid[x][y] = [copy.copy(unit) for unit in units]
+        if self._index_built:
+            new_map._index_built = True
+            new_map._structure_index = {key: set(cells) for key, cells in self._structure_index.items()}
+            new_map._blocked_mask = self._blocked_mask
+        return new_map
+
     def warn(self, message):
         """
         Used internally by game_map to print out default messaging
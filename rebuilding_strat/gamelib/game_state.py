@@ -2,36 +2,26 @@ import math
 import json
 import sys
 
+from . import board
 from .navigation import ShortestPathFinder
-from .util import send_command, debug_write
+from .util import send_command, debug_write, decode_message
 from .unit import GameUnit
 from .game_map import GameMap
+from .threat_map import ThreatMap
+from .catalog import UnitCatalog
+from .zobrist import ZobristHash
 
-def is_stationary(unit_type):
-    """
-        Args:
-            unit_type: A unit type
-        
-        Returns: 
-            Boolean, True if the unit is stationary, False otherwise.
-    """
-    return unit_type in STRUCTURE_TYPES
+# Resource indices, used in get_resource and cost lists
+SP = 0
+MP = 1
 
 class GameState:
     """Represents the entire gamestate for a given turn
     Provides methods related to resources and unit deployment
 
     Attributes :
-        * UNIT_TYPE_TO_INDEX (dict): Maps a unit to a corresponding index
-        * WALL (str): A constant representing the wall unit
-        * SUPPORT (str): A constant representing the support unit
-        * TURRET (str): A constant representing the turret unit
-        * SCOUT (str): A constant representing the scout unit
-        * DEMOLISHER (str): A constant representing the demolisher unit
-        * INTERCEPTOR (str): A constant representing the interceptor unit
-        * REMOVE (str): A constant representing removing your own unit
-        * UPGRADE (str): A constant representing upgrading a unit
-        * STRUCTURE_TYPES (list): A list of the structure units
+        * catalog (:obj: UnitCatalog): The unit types of the config. Holds WALL, TURRET, etc., 
+          the STRUCTURE_TYPES and UNIT_TYPE_TO_INDEX, and the cost of each unit
 
         * ARENA_SIZE (int): The size of the arena
         * HALF_ARENA (int): Half the size of the arena
@@ -39,6 +29,8 @@ class GameState:
         * SP (int): A constant representing the SP resource, used in the get_resource function
          
         * game_map (:obj: GameMap): The current GameMap. To retrieve a list of GameUnits at a location, use game_map[x, y]
+        * threat_map (:obj: ThreatMap): The structures attacking each location, kept in sync with game_map
+        * zobrist (:obj: ZobristHash): A hash of the structures on game_map, kept in sync with it
         * turn_number (int): The current turn number. Starts at 0.
         * my_health (int): Your current remaining health
         * my_time (int): The time you took to submit your previous turn
@@ -47,52 +39,34 @@ class GameState:
 
     """
 
-    def __init__(self, config, serialized_string):
+    def __init__(self, config, serialized_string, catalog=None):
         """ Setup a turns variables using arguments passed
 
         Args:
             * config (JSON): A json object containing information about the game
-            * serialized_string (string): A string containing information about the game state at the start of this turn
+            * serialized_string (string): A string containing information about the game state at the start of this turn. 
+              The ParsedMessage AlgoCore passes to on_turn is not decoded again
+            * catalog (:obj: UnitCatalog): The unit types of the config, AlgoCore keeps one in self.catalog. 
+              Looked up from the config if not given
 
         """
         self.serialized_string = serialized_string
         self.config = config
+        self.catalog = catalog if catalog is not None else UnitCatalog.for_config(config)
         self.enable_warnings = True
 
-        global WALL, SUPPORT, TURRET, SCOUT, DEMOLISHER, INTERCEPTOR, REMOVE, UPGRADE, STRUCTURE_TYPES, ALL_UNITS, UNIT_TYPE_TO_INDEX
-        UNIT_TYPE_TO_INDEX = {}
-        WALL = config["unitInformation"][0]["shorthand"]
-        UNIT_TYPE_TO_INDEX[WALL] = 0
-        SUPPORT = config["unitInformation"][1]["shorthand"]
-        UNIT_TYPE_TO_INDEX[SUPPORT] = 1
-        TURRET = config["unitInformation"][2]["shorthand"]
-        UNIT_TYPE_TO_INDEX[TURRET] = 2
-        SCOUT = config["unitInformation"][3]["shorthand"]
-        UNIT_TYPE_TO_INDEX[SCOUT] = 3
-        DEMOLISHER = config["unitInformation"][4]["shorthand"]
-        UNIT_TYPE_TO_INDEX[DEMOLISHER] = 4
-        INTERCEPTOR = config["unitInformation"][5]["shorthand"]
-        UNIT_TYPE_TO_INDEX[INTERCEPTOR] = 5
-        REMOVE = config["unitInformation"][6]["shorthand"]
-        UNIT_TYPE_TO_INDEX[REMOVE] = 6
-        UPGRADE = config["unitInformation"][7]["shorthand"]
-        UNIT_TYPE_TO_INDEX[UPGRADE] = 7
-
-        ALL_UNITS = [SCOUT, DEMOLISHER, INTERCEPTOR, WALL, SUPPORT, TURRET]
-        STRUCTURE_TYPES = [WALL, SUPPORT, TURRET]
-
         self.ARENA_SIZE = 28
         self.HALF_ARENA = int(self.ARENA_SIZE / 2)
-        self.MP = 1
-        self.SP = 0
-        global MP, SP
-        MP = self.MP
-        SP = self.SP
+        self.MP = MP
+        self.SP = SP
 
-        self.game_map = GameMap(self.config)
+        self.game_map = GameMap(self.config, self.catalog)
+        self.threat_map = ThreatMap(self.game_map)
+        self.zobrist = ZobristHash(self.game_map)
         self._shortest_path_finder = ShortestPathFinder()
         self._build_stack = []
-        self._deploy_stack = []
+        # Mobile units to deploy as [unit_type, x, y, count], one entry per run of units spawned together
+        self._deploy_groups = []
         self._player_resources = [
                 {'SP': 0, 'MP': 0},  # player 0, which is you
                 {'SP': 0, 'MP': 0}]  # player 1, which is the opponent
@@ -101,9 +75,9 @@ class GameState:
     def __parse_state(self, state_line):
         """
         Fills in map based on the serialized game state so that self.game_map[x,y] is a list of GameUnits at that location.
-        state_line is the game state as a json string.
+        state_line is the game state as a json string, or a ParsedMessage whose decoded state is reused.
         """
-        state = json.loads(state_line)
+        state = decode_message(state_line)
 
         turn_info = state["turnInfo"]
         self.turn_number = int(turn_info[1])
@@ -130,27 +104,27 @@ class GameState:
         """
         Helper function for __parse_state to add units to the map.
         """
-        typedef = self.config.get("unitInformation")
+        catalog = self.catalog
         for i, unit_types in enumerate(units):
             for uinfo in unit_types:
-                unit_type = typedef[i].get("shorthand")
+                unit_type = catalog.UNIT_TYPES[i]
                 sx, sy, shp = uinfo[:3]
                 x, y = map(int, [sx, sy])
                 hp = float(shp)
                 # This depends on RM and UP always being the last types to be processed
-                if unit_type == REMOVE:
+                if unit_type == catalog.REMOVE:
                     # Quick fix will deploy engine fix soon
                     if self.contains_stationary_unit([x,y]):
                         self.game_map[x,y][0].pending_removal = True
-                elif unit_type == UPGRADE:
+                elif unit_type == catalog.UPGRADE:
                     if self.contains_stationary_unit([x,y]):
-                        self.game_map[x,y][0].upgrade()
+                        self.game_map.upgrade_unit([x,y])
                 else:
-                    unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
+                    unit = GameUnit(unit_type, self.config, player_number, hp, x, y, catalog)
                     self.game_map[x,y].append(unit)
 
     def __resource_required(self, unit_type):
-        return self.SP if is_stationary(unit_type) else self.MP
+        return self.SP if self.catalog.is_stationary(unit_type) else self.MP
 
     def __set_resource(self, resource_type, amount, player_index=0):
         """
@@ -171,6 +145,12 @@ class GameState:
     def _invalid_unit(self, unit):
         self.warn("Invalid unit {}".format(unit))
 
+    @property
+    def _deploy_stack(self):
+        """The mobile units to deploy, one (unit_type, x, y) per unit, as sent to the engine
+        """
+        return [(unit_type, x, y) for unit_type, x, y, count in self._deploy_groups for _ in range(count)]
+
     def submit_turn(self):
         """Submit and end your turn.
             Must be called at the end of your turn or the algo will hang.
@@ -234,7 +214,7 @@ class GameState:
             The number of units affordable of the given unit_type.
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.catalog.ALL_UNITS:
             self._invalid_unit(unit_type)
             return
 
@@ -292,16 +272,14 @@ class GameState:
             The units costs as a list [SP, MP]
 
         """
-        if unit_type == REMOVE:
+        if unit_type == self.catalog.REMOVE:
             self._invalid_unit(unit_type)
             return
         
-        unit_def = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]
-        cost_base = [unit_def.get('cost1', 0), unit_def.get('cost2', 0)]
         if upgrade:
-            return [unit_def.get('upgrade', {}).get('cost1', cost_base[SP]), unit_def.get('upgrade', {}).get('cost2', cost_base[MP])]
+            return list(self.catalog.upgrade_costs.get(unit_type, self.catalog.costs[unit_type]))
 
-        return cost_base
+        return list(self.catalog.costs[unit_type])
 
 
     def can_spawn(self, unit_type, location, num=1):
@@ -320,7 +298,7 @@ class GameState:
             True if we can spawn the unit(s)
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.catalog.ALL_UNITS:
             self._invalid_unit(unit_type)
             return
         
@@ -330,10 +308,10 @@ class GameState:
             return False
 
         affordable = self.number_affordable(unit_type) >= num
-        stationary = is_stationary(unit_type)
+        stationary = self.catalog.is_stationary(unit_type)
         blocked = self.contains_stationary_unit(location) or (stationary and len(self.game_map[location[0],location[1]]) > 0)
         correct_territory = location[1] < self.HALF_ARENA
-        on_edge = location in (self.game_map.get_edge_locations(self.game_map.BOTTOM_LEFT) + self.game_map.get_edge_locations(self.game_map.BOTTOM_RIGHT))
+        on_edge = board.EDGE_OF.get((location[0], location[1])) in (board.BOTTOM_LEFT, board.BOTTOM_RIGHT)
 
         if self.enable_warnings:
             fail_reason = ""
@@ -364,7 +342,7 @@ class GameState:
             The number of units successfully spawned
 
         """
-        if unit_type not in ALL_UNITS:
+        if unit_type not in self.catalog.ALL_UNITS:
             self._invalid_unit(unit_type)
             return
         if num < 1 or not locations:
@@ -373,22 +351,31 @@ class GameState:
       
         if type(locations[0]) == int:
             locations = [locations]
+        stationary = self.catalog.is_stationary(unit_type)
+        costs = self.type_cost(unit_type)
         spawned_units = 0
         for location in locations:
-            for i in range(num):
-                if self.can_spawn(unit_type, location, 1):
-                    x, y = map(int, location)
-                    costs = self.type_cost(unit_type)
-                    self.__set_resource(SP, 0 - costs[SP])
-                    self.__set_resource(MP, 0 - costs[MP])
-                    self.game_map.add_unit(unit_type, location, 0)
-                    if is_stationary(unit_type):
-                        self._build_stack.append((unit_type, x, y))
-                    else:
-                        self._deploy_stack.append((unit_type, x, y))
-                    spawned_units += 1
+            # Spawning never changes where a unit can go, only what is left to pay with, 
+            # so each location is checked once and as many units as can be afforded are spawned together
+            if not self.can_spawn(unit_type, location, 1):
+                continue
+            count = 1 if stationary else min(num, self.number_affordable(unit_type))
+            x, y = map(int, location)
+            self.__set_resource(SP, 0 - costs[SP] * count)
+            self.__set_resource(MP, 0 - costs[MP] * count)
+            self.game_map.add_units(unit_type, location, 0, count)
+            if stationary:
+                self._build_stack.append((unit_type, x, y))
+            else:
+                last = self._deploy_groups[-1] if self._deploy_groups else None
+                if last is not None and last[0] == unit_type and last[1] == x and last[2] == y:
+                    last[3] += count
                 else:
-                    break
+                    self._deploy_groups.append([unit_type, x, y, count])
+            spawned_units += count
+            if count < num:
+                # Warns why no more could be spawned
+                self.can_spawn(unit_type, location, 1)
         return spawned_units
 
     def attempt_remove(self, locations):
@@ -407,7 +394,7 @@ class GameState:
         for location in locations:
             if location[1] < self.HALF_ARENA and self.contains_stationary_unit(location):
                 x, y = map(int, location)
-                self._build_stack.append((REMOVE, x, y))
+                self._build_stack.append((self.catalog.REMOVE, x, y))
                 removed_units += 1
             else:
                 self.warn("Could not remove a unit from {}. Location has no structures or is enemy territory.".format(location))
@@ -439,14 +426,14 @@ class GameState:
                     if unit.stationary:
                         existing_unit = unit
 
-                if not existing_unit.upgraded and self.config["unitInformation"][UNIT_TYPE_TO_INDEX[existing_unit.unit_type]].get("upgrade", None) is not None:
+                if not existing_unit.upgraded and existing_unit.unit_type in self.catalog.upgrade_costs:
                     costs = self.type_cost(existing_unit.unit_type, True)
                     resources = self.get_resources()
                     if resources[SP] >= costs[SP] and resources[MP] >= costs[MP]:
                         self.__set_resource(SP, 0 - costs[SP])
                         self.__set_resource(MP, 0 - costs[MP])
-                        existing_unit.upgrade()
-                        self._build_stack.append((UPGRADE, x, y))
+                        self.game_map.upgrade_unit([x, y])
+                        self._build_stack.append((self.catalog.UPGRADE, x, y))
                         spawned_units += 1
             else:
                 self.warn("Could not upgrade a unit from {}. Location has no structures or is enemy territory.".format(location))
@@ -498,6 +485,68 @@ class GameState:
         end_points = self.game_map.get_edge_locations(target_edge)
         return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
 
+    def find_best_reachable_tile(self, start_location, target_edge=None):
+        """Gets the tile a unit at a given location would path towards, much faster than finding its path.
+        If the tile is not on the target edge, the unit would self destruct there.
+
+        Args:
+            start_location: The location of a hypothetical unit
+            target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from start_location if None.
+
+        Returns:
+            The [x, y] location of the tile, or None if start_location is blocked
+
+        """
+        if target_edge is None:
+            target_edge = self.get_target_edge(start_location)
+        return self._shortest_path_finder.best_reachable_tile(start_location, target_edge, self)
+
+    def find_path_to_edge_cells(self, start_cell, target_edge=None):
+        """Like find_path_to_edge, but takes and returns cell ids
+
+        Args:
+            start_cell: The cell id of a hypothetical unit
+            target_edge: The edge the unit wants to reach. Induced from start_cell if None.
+
+        Returns:
+            A list of the cell ids of the path, or None if start_cell is blocked
+
+        """
+        if self.contains_stationary_unit_cell(start_cell):
+            self.warn("Attempted to perform pathing from blocked starting location {}".format(list(board.CELLS[start_cell])))
+            return
+
+        if target_edge is None:
+            target_edge = self.get_target_edge(board.CELLS[start_cell])
+
+        end_points = self.game_map.get_edge_locations(target_edge)
+        return self._shortest_path_finder.navigate_cells(start_cell, end_points, self)
+
+    def find_paths_to_edge(self, start_locations, target_edge=None):
+        """Gets the paths units at many locations would take, sharing one search per target edge.
+        Equivalent to calling find_path_to_edge for each location, but much faster for long lists.
+
+        Args:
+            start_locations: A list of locations of hypothetical units
+            target_edge: The edge the units want to reach. Induced from each start location if None.
+
+        Returns:
+            A list with the path for each start location, in the same order. 
+            The entry is None for blocked locations.
+
+        """
+        by_edge = {}
+        for i, location in enumerate(start_locations):
+            edge = self.get_target_edge(location) if target_edge is None else target_edge
+            by_edge.setdefault(edge, []).append(i)
+
+        paths = [None] * len(start_locations)
+        for edge, indices in by_edge.items():
+            edge_paths = self._shortest_path_finder.navigate_all_starts([start_locations[i] for i in indices], edge, self)
+            for i, path in zip(indices, edge_paths):
+                paths[i] = path
+        return paths
+
     def contains_stationary_unit(self, location):
         """Check if a location is blocked, return structures unit if it is
 
@@ -517,6 +566,61 @@ class GameState:
                 return unit
         return False
 
+    def contains_stationary_unit_cell(self, cell):
+        """Like contains_stationary_unit, but takes a cell id, see board.CELLS
+
+        Returns:
+            A structures unit if there is a stationary unit at the cell, False otherwise
+
+        """
+        for unit in self.game_map.units_at_cell(cell):
+            if unit.stationary:
+                return unit
+        return False
+
+    def clone(self):
+        """Creates an independent copy of this game state without re-parsing the serialized string.
+
+        The map, resources, build and deploy stacks and path finder are copied. The config and 
+        serialized string are shared.
+
+        Returns:
+            A new GameState that can be changed without affecting this one
+
+        """
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.game_map = self.game_map.copy()
+        state.threat_map = self.threat_map.copy(state.game_map)
+        state.zobrist = self.zobrist.copy(state.game_map)
+        state._shortest_path_finder = self._shortest_path_finder.copy()
+        state._build_stack = list(self._build_stack)
+        state._deploy_groups = [list(group) for group in self._deploy_groups]
+        state._player_resources = [dict(resources) for resources in self._player_resources]
+        return state
+
+    def snapshot(self):
+        """Saves the current state so it can be brought back later with restore.
+
+        Returns:
+            An opaque snapshot to pass to restore
+            
+        """
+        return self.clone()
+
+    def restore(self, snapshot):
+        """Resets this game state to a snapshot taken with snapshot. 
+        The same snapshot can be restored any number of times.
+
+        Args:
+            snapshot: A value returned by snapshot
+
+        """
+        # The path finder is kept, its cached paths are checked against the board they are used on
+        path_finder = self._shortest_path_finder
+        self.__dict__.update(snapshot.clone().__dict__)
+        self._shortest_path_finder = path_finder
+
     def warn(self, message):
         """ Used internally by game_state to print warnings
         """
@@ -535,6 +639,15 @@ class GameState:
         self.enable_warnings = not suppress
         self.game_map.enable_warnings = not suppress
 
+    def set_path_finder(self, path_finder):
+        """Replace the path finder used by find_path_to_edge
+
+        Args:
+            path_finder: A ShortestPathFinder or a drop-in replacement such as ArrayShortestPathFinder
+
+        """
+        self._shortest_path_finder = path_finder
+
     def get_target(self, attacking_unit):
         """Returns target of given unit based on current map of the game board. 
         A Unit can often have many other units in range, and Units that attack do so once each frame.
@@ -554,65 +667,54 @@ class GameState:
             self.warn("Passed a {} to get_target as attacking_unit. Expected a GameUnit.".format(type(attacking_unit)))
             return
 
-        attacker_location = [attacking_unit.x, attacking_unit.y]
-        possible_locations = self.game_map.get_locations_in_range(attacker_location, attacking_unit.attackRange)
-        target = None
-        target_stationary = True
-        target_distance = sys.maxsize
-        target_health = sys.maxsize
-        target_y = self.ARENA_SIZE
-        target_x_distance = 0
-
-        for location in possible_locations:
-            for unit in self.game_map[location]:
-                if unit.player_index == attacking_unit.player_index or (attacking_unit.damage_f == 0 and is_stationary(unit.unit_type)) or (attacking_unit.damage_i == 0 and not(is_stationary(unit.unit_type))):
-                    continue
+        return self.get_targets([attacking_unit])[0]
 
-                new_target = False
-                unit_stationary = unit.stationary
-                unit_distance = self.game_map.distance_between_locations(location, [attacking_unit.x, attacking_unit.y])
-                unit_health = unit.health
-                unit_y = unit.y
-                unit_x_distance = abs(self.HALF_ARENA - 0.5 - unit.x)
+    def get_targets(self, attacking_units):
+        """Returns the target of each of many units, the same as calling get_target on each of them
 
-                if target_stationary and not unit_stationary:
-                    new_target = True
-                elif not target_stationary and unit_stationary:
-                    continue
-                
-                if target_distance > unit_distance:
-                    new_target = True
-                elif target_distance < unit_distance and not new_target:
-                    continue
+        The units in range of each attacker are packed into a list of sort keys
+        (stationary, distance, health, y relative to the attacker's side, negated x distance from the center)
+        and the target is the first unit with the smallest key. 
+        Units on a location are only packed once however many attackers can reach it.
 
-                if target_health > unit_health:
-                    new_target = True
-                elif target_health < unit_health and not new_target:
-                    continue
+        Args:
+            attacking_units: A list of GameUnits
 
-                # Compare height heuristic relative to attacking unit's player index
-                if attacking_unit.player_index == 0:
-                    if target_y > unit_y:
-                        new_target = True
-                    elif target_y < unit_y and not new_target:
-                        continue
-                else:
-                    if target_y < unit_y:
-                        new_target = True
-                    elif target_y > unit_y and not new_target:
-                        continue
+        Returns:
+            A list with the GameUnit each unit would choose to attack, None if it has no target
 
-                if target_x_distance < unit_x_distance:
-                    new_target = True
-                
-                if new_target:
-                    target = unit
-                    target_stationary = unit_stationary
-                    target_distance = unit_distance
-                    target_health = unit_health
-                    target_y = unit_y
-                    target_x_distance = unit_x_distance
-        return target
+        """
+        packed = {}
+        targets = []
+        for attacking_unit in attacking_units:
+            if not isinstance(attacking_unit, GameUnit):
+                self.warn("Passed a {} to get_targets as attacking_unit. Expected a GameUnit.".format(type(attacking_unit)))
+                targets.append(None)
+                continue
+
+            x, y = attacking_unit.x, attacking_unit.y
+            player_index = attacking_unit.player_index
+            hits_structures = attacking_unit.damage_f != 0
+            hits_mobile = attacking_unit.damage_i != 0
+            y_sign = 1 if player_index == 0 else -1
+            candidates = []
+            keys = []
+            for location in self.game_map.get_locations_in_range([x, y], attacking_unit.attackRange):
+                location_key = (location[0], location[1])
+                rows = packed.get(location_key)
+                if rows is None:
+                    rows = packed[location_key] = [(unit, unit.stationary, unit.health, unit.y, -abs(self.HALF_ARENA - 0.5 - unit.x)) 
+                                                   for unit in self.game_map[location]]
+                if not rows:
+                    continue
+                distance = math.sqrt((location[0] - x)**2 + (location[1] - y)**2)
+                for unit, stationary, health, unit_y, x_distance in rows:
+                    if unit.player_index == player_index or not (hits_structures if stationary else hits_mobile):
+                        continue
+                    candidates.append(unit)
+                    keys.append((stationary, distance, health, y_sign * unit_y, x_distance))
+            targets.append(candidates[min(range(len(keys)), key=keys.__getitem__)] if keys else None)
+        return targets
 
     def get_attackers(self, location, player_index):
         """Gets the stationary units threatening a given location
@@ -639,10 +741,25 @@ class GameState:
         for unit in self.config["unitInformation"]:
             if unit.get('attackRange', 0) >= max_range:
                 max_range = unit.get('attackRange', 0)
-        possible_locations= self.game_map.get_locations_in_range(location, max_range)
-        for location_unit in possible_locations:
-            for unit in self.game_map[location_unit]:
-                if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index and self.game_map.distance_between_locations(location, location_unit) <= unit.attackRange:
+        x, y = location
+        cell = board.cell_id(x, y) if type(x) is int and type(y) is int else -1
+        if cell < 0:
+            possible_locations= self.game_map.get_locations_in_range(location, max_range)
+            for location_unit in possible_locations:
+                for unit in self.game_map[location_unit]:
+                    if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index and self.game_map.distance_between_locations(location, location_unit) <= unit.attackRange:
+                        attackers.append(unit)
+            return attackers
+
+        # Same search over cell ids, so no location lists are built
+        for cell_in_range in self.game_map.get_cells_in_range(cell, max_range):
+            units = self.game_map.units_at_cell(cell_in_range)
+            if not units:
+                continue
+            unit_x, unit_y = board.CELLS[cell_in_range]
+            distance = math.sqrt((x - unit_x) ** 2 + (y - unit_y) ** 2)
+            for unit in units:
+                if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index and distance <= unit.attackRange:
                     attackers.append(unit)
         return attackers
 
@@ -2,6 +2,9 @@ import heapq
 import math
 import sys
 import queue
+from array import array
+from collections import deque
+from . import board
 from .util import debug_write
 
 class Node:
@@ -34,12 +37,17 @@ class ShortestPathFinder:
 
         * game_state (:obj: GameState): The current gamestate
         * game_map (:obj: GameMap): The current gamemap
+        * cache_paths (bool): Keep the paths found between calls, see navigate_all_starts
 
     """
-    def __init__(self):
+    def __init__(self, cache_paths=False):
         self.HORIZONTAL = 1
         self.VERTICAL = 2
         self.initialized = False
+        self.cache_paths = cache_paths
+        # Maps (start cell, end points) to (mask of the cells the path depends on, path after the start)
+        self._path_cache = {}
+        self._cache_blocked = None
 
     def initialize_map(self, game_state):
         """Initializes the map
@@ -49,6 +57,7 @@ class ShortestPathFinder:
         """
         #Initialize map 
         self.initialized = True
+        self._edge_validated = False
         self.game_state = game_state
         self.game_map = [[Node() for x in range(self.game_state.ARENA_SIZE)] for y in range(self.game_state.ARENA_SIZE)]
 
@@ -67,36 +76,234 @@ class ShortestPathFinder:
         """
         if game_state.contains_stationary_unit(start_point):
             return
+        if self.cache_paths:
+            return self._cached_paths([start_point], end_points, game_state)[0]
 
         #Initialize map 
         self.initialize_map(game_state)
         #Fill in walls
-        for location in self.game_state.game_map:
-            if self.game_state.contains_stationary_unit(location):
-                self.game_map[location[0]][location[1]].blocked = True
+        self._fill_blocked(game_state)
         #Do pathfinding
-        ideal_endpoints = self._idealness_search(start_point, end_points)
-        self._validate(ideal_endpoints, end_points)
+        self._search_pocket(start_point, end_points)
         return self._get_path(start_point, end_points)
 
+    def navigate_cells(self, start_cell, end_points, game_state):
+        """Like navigate_multiple_endpoints, but takes a cell id and returns the path as cell ids
+
+        Args:
+            * start_cell: The cell id of the starting location of the unit, see board.CELLS
+            * end_points: The end points of the unit, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            A list of the cell ids of the path, or None if start_cell is blocked
+
+        """
+        path = self.navigate_multiple_endpoints(list(board.CELLS[start_cell]), end_points, game_state)
+        if path is None:
+            return None
+        return [board.cell_id(x, y) for x, y in path]
+
+    def navigate_all_starts(self, start_points, target_edge, game_state):
+        """Finds the paths units at many start points would take to reach the same edge
+
+        The walls are filled in once, and the pathlengths are computed once per pocket of
+        pathable space, so every start point on the same side shares a single search.
+
+        Args:
+            * start_points: A list of starting locations
+            * target_edge: The edge the units want to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc.
+            * game_state: The current game state
+
+        With cache_paths set, the paths found are kept, and on later calls, for this or any other
+        game state, only the start points whose pocket, or a structure bordering it, has changed
+        since are searched again. This makes it cheap to ask for the same spawn paths every turn.
+
+        Returns:
+            A list with the path for each start point, in the same order. 
+            The entry is None for start points that are blocked or off the board.
+
+        """
+        end_points = game_state.game_map.get_edge_locations(target_edge)
+        if self.cache_paths:
+            return self._cached_paths(start_points, end_points, game_state)
+        return self._navigate_all_starts(start_points, end_points, game_state)
+
+    def _navigate_all_starts(self, start_points, end_points, game_state):
+        self.initialize_map(game_state)
+        self._fill_blocked(game_state)
+
+        paths = [None] * len(start_points)
+        pending = [i for i, start in enumerate(start_points)
+                   if game_state.game_map.in_arena_bounds(start) and not game_state.contains_stationary_unit(start)]
+        while pending:
+            self._search_pocket(start_points[pending[0]], end_points)
+
+            # The idealness search marks the whole pocket, so every other start in it is done as well
+            remaining = []
+            for i in pending:
+                if self._visited_idealness_at(start_points[i]):
+                    paths[i] = self._get_path(start_points[i], end_points)
+                else:
+                    remaining.append(i)
+            pending = remaining
+        return paths
+
+    def clear_path_cache(self):
+        """Forgets every path kept by cache_paths
+        """
+        self._path_cache = {}
+        self._cache_blocked = None
+
+    def copy(self):
+        """A new path finder of the same class and settings, starting with the paths cached so far.
+        Searches on either one leave the other's cache alone
+
+        """
+        finder = type(self)(self.cache_paths)
+        # The cached entries are tuples and the blocked cells are replaced rather than changed, so they can be shared
+        finder._path_cache = dict(self._path_cache)
+        finder._cache_blocked = self._cache_blocked
+        return finder
+
+    def _cached_paths(self, start_points, end_points, game_state):
+        """navigate_all_starts, answering from the path cache where it can
+        """
+        blocked = self._blocked_cells(game_state)
+        self._invalidate_changed(blocked)
+        cache = self._path_cache
+        edge_key = tuple(map(tuple, end_points))
+
+        paths = [None] * len(start_points)
+        missing = []
+        for i, start in enumerate(start_points):
+            cell = board.cell_id(start[0], start[1])
+            if cell < 0 or blocked[cell]:
+                continue
+            entry = cache.get((cell, edge_key))
+            if entry is None:
+                missing.append(i)
+            else:
+                paths[i] = [start] + [list(location) for location in entry[1]]
+        if not missing:
+            return paths
+
+        found = self._navigate_all_starts([start_points[i] for i in missing], end_points, game_state)
+        masks = []
+        for i, path in zip(missing, found):
+            paths[i] = path
+            cell = board.cell_id(start_points[i][0], start_points[i][1])
+            # Starts in the same pocket depend on the same cells
+            mask = next((mask for mask in masks if mask >> cell & 1), None)
+            if mask is None:
+                mask = self._pocket_mask(cell, blocked)
+                masks.append(mask)
+            cache[cell, edge_key] = (mask, tuple(tuple(location) for location in path[1:]))
+        return paths
+
+    def _blocked_cells(self, game_state):
+        blocked = bytearray(board.CELL_COUNT)
+        for cell in board.mask_cells(game_state.game_map.blocked_mask()):
+            blocked[cell] = 1
+        return blocked
+
+    def _invalidate_changed(self, blocked):
+        """Drops the cached paths depending on a cell whose blocked state differs from the last call
+        """
+        previous = self._cache_blocked
+        self._cache_blocked = blocked
+        if previous is None or previous == blocked:
+            return
+        changed = 0
+        for cell in range(board.CELL_COUNT):
+            if previous[cell] != blocked[cell]:
+                changed |= 1 << cell
+        self._path_cache = {key: entry for key, entry in self._path_cache.items() if not entry[0] & changed}
+
+    def _pocket_mask(self, cell, blocked):
+        """A bit mask of the pocket of pathable space containing cell, and the blocked cells bordering it.
+        A path only depends on these cells, since both searches stay inside the pocket
+        """
+        neighbors = board.NEIGHBORS
+        seen = 1 << cell
+        stack = [cell]
+        while stack:
+            for neighbor in neighbors[stack.pop()]:
+                bit = 1 << neighbor
+                if seen & bit:
+                    continue
+                seen |= bit
+                if not blocked[neighbor]:
+                    stack.append(neighbor)
+        return seen
+
+    def _fill_blocked(self, game_state):
+        for cell in board.mask_cells(game_state.game_map.blocked_mask()):
+            x, y = board.CELLS[cell]
+            self.game_map[x][y].blocked = True
+
+    def _visited_idealness_at(self, location):
+        return self.game_map[location[0]][location[1]].visited_idealness
+
+    def set_blocked(self, location, blocked, end_points):
+        """Updates the pathlengths after a structure is placed at, or removed from, location, 
+        so that _get_path gives the path a unit would now take without initializing the map again
+
+        The pockets searched since initialize_map are searched again. ArrayShortestPathFinder
+        overrides this to repair only the pathlengths that change.
+
+        Args:
+            * location: The location whose structure changed
+            * blocked: True if a structure was placed there, False if it was removed
+            * end_points: The end points of the last search
+
+        """
+        searched = [[x, y] for x, y in board.CELLS if self.game_map[x][y].visited_idealness]
+        for row in self.game_map:
+            for node in row:
+                node.visited_idealness = False
+                node.visited_validate = False
+                node.pathlength = -1
+        self.game_map[location[0]][location[1]].blocked = blocked
+        self._edge_validated = False
+        for start in searched:
+            if not self.game_map[start[0]][start[1]].blocked:
+                self._search_pocket(start, end_points)
+
+    def _search_pocket(self, start, end_points):
+        """Sets the pathlengths of the pocket of pathable space containing start,
+        unless an earlier search since initialize_map already covered it
+
+        """
+        if self._visited_idealness_at(start):
+            return
+        ideal_tile = self._idealness_search(start, end_points)
+        if ideal_tile in end_points:
+            # Every pocket touching the edge shares the pathlengths from the edge
+            if self._edge_validated:
+                return
+            self._edge_validated = True
+        self._validate(ideal_tile, end_points)
+
     def _idealness_search(self, start, end_points):
         """
         Finds the most ideal tile in our 'pocket' of pathable space. 
         The edge if it is available, or the best self destruct location otherwise
         """
+        table = self._idealness_table(end_points)
         current = queue.Queue()
         current.put(start)
-        best_idealness = self._get_idealness(start, end_points)
+        best_idealness = table[board.cell_id(start[0], start[1])]
         self.game_map[start[0]][start[1]].visited_idealness = True
         most_ideal = start
 
         while not current.empty():
             search_location = current.get()
             for neighbor in self._get_neighbors(search_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+                if not board.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
                     continue                                                                         
                 x, y = neighbor
-                current_idealness = self._get_idealness(neighbor, end_points)
+                current_idealness = table[board.cell_id(x, y)]
 
                 if current_idealness > best_idealness:
                     best_idealness = current_idealness
@@ -108,6 +315,72 @@ class ShortestPathFinder:
 
         return most_ideal
 
+    def _idealness_table(self, end_points):
+        """The idealness of every cell, indexed by cell id. 
+        Taken from board.IDEALNESS when end_points are a whole edge, computed otherwise
+        """
+        edge = board.EDGE_OF.get(tuple(end_points[0]))
+        if edge is not None and len(end_points) == len(board.EDGES[edge]):
+            edge_set = board.EDGE_SETS[edge]
+            if all(tuple(location) in edge_set for location in end_points):
+                return board.IDEALNESS[edge]
+        return [self._get_idealness(list(location), end_points) for location in board.CELLS]
+
+    def best_reachable_tile(self, start_point, target_edge, game_state):
+        """Finds the tile a unit would path towards, without computing any pathlengths
+
+        This is the most ideal tile of the unit's pocket of pathable space: the first edge location 
+        found if the pocket reaches the edge, or else the location where the unit would self destruct.
+        The flood fill stops as soon as it reaches the edge, and doesn't change the path finder's state.
+
+        Args:
+            * start_point: The starting location of the unit
+            * target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc.
+            * game_state: The current game state
+
+        Returns:
+            The [x, y] location of the tile, or None if start_point is blocked or off the board
+
+        """
+        start_cell = board.cell_of(start_point)
+        if start_cell < 0 or game_state.contains_stationary_unit_cell(start_cell):
+            return None
+        table = board.IDEALNESS[target_edge]
+        neighbors = board.NEIGHBORS
+        best_cell = start_cell
+        best_idealness = table[start_cell]
+        seen = {start_cell}
+        current = deque((start_cell,))
+        while current and best_idealness != sys.maxsize:
+            for neighbor in neighbors[current.popleft()]:
+                if neighbor in seen or game_state.contains_stationary_unit_cell(neighbor):
+                    continue
+                seen.add(neighbor)
+                if table[neighbor] > best_idealness:
+                    best_idealness = table[neighbor]
+                    best_cell = neighbor
+                current.append(neighbor)
+        return list(board.CELLS[best_cell])
+
+    def next_step_cell(self, cell, previous_move_direction, end_points):
+        """Finds the next step of a unit, searching the pocket containing it first if no search 
+        since initialize_map covered it. Stepping a unit one cell at a time this way follows _get_path
+
+        Args:
+            * cell: The cell id of the unit
+            * previous_move_direction: The direction of the unit's last move, HORIZONTAL, VERTICAL or 0 if it has not moved
+            * end_points: The end points of the unit, should be a list of edge locations
+
+        Returns:
+            The cell id the unit moves to next, cell itself if the unit has reached its target
+
+        """
+        location = list(board.CELLS[cell])
+        self._search_pocket(location, end_points)
+        if self.game_map[location[0]][location[1]].pathlength == 0:
+            return cell
+        return board.cell_id(*self._choose_next_move(location, previous_move_direction, end_points))
+
     def _get_neighbors(self, location):
         """Get the locations adjacent to a location
         """
@@ -180,7 +453,7 @@ class ShortestPathFinder:
             current_location = current.get()
             current_node = self.game_map[current_location[0]][current_location[1]]
             for neighbor in self._get_neighbors(current_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+                if not board.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
                     continue
 
                 neighbor_node = self.game_map[neighbor[0]][neighbor[1]]
@@ -227,7 +500,7 @@ class ShortestPathFinder:
         best_pathlength = self.game_map[current_point[0]][current_point[1]].pathlength
         for neighbor in neighbors:
             #debug_write("Comparing champ {} and contender {}".format(ideal_neighbor, neighbor))
-            if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+            if not board.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
                 continue
 
             new_best = False
@@ -313,3 +586,403 @@ class ShortestPathFinder:
             sys.stderr.write(" ")
         sys.stderr.write(str(number))
         sys.stderr.write(" ")
+
+
+
+class ArrayShortestPathFinder(ShortestPathFinder):
+    """Drop-in replacement for ShortestPathFinder backed by flat arrays
+
+    Pathfinding state is kept in preallocated arrays indexed by cell, over the
+    in-bounds locations of the board, instead of a grid of Node objects, and searches
+    use a plain deque. Results are identical to ShortestPathFinder.
+    Use it with game_state.set_path_finder(ArrayShortestPathFinder()).
+
+    Attributes :
+        * blocked (bytearray): 1 for each cell containing a structure
+        * pathlength (array): The distance between each cell and the target location, -1 if unreached
+
+    """
+    def __init__(self, cache_paths=False):
+        super().__init__(cache_paths)
+        self.blocked = bytearray(board.CELL_COUNT)
+        self.pathlength = array('h', [-1]) * board.CELL_COUNT
+        self._visited_idealness = bytearray(board.CELL_COUNT)
+        self._visited_validate = bytearray(board.CELL_COUNT)
+        self._empty = bytearray(board.CELL_COUNT)
+        self._unreached = array('h', [-1]) * board.CELL_COUNT
+
+    def initialize_map(self, game_state):
+        """Initializes the map
+
+        Args:
+            game_state: A GameState object representing the gamestate we want to traverse
+        """
+        self.initialized = True
+        self._edge_validated = False
+        self.game_state = game_state
+        self.blocked[:] = self._empty
+        self._visited_idealness[:] = self._empty
+        self._visited_validate[:] = self._empty
+        self.pathlength[:] = self._unreached
+
+    def navigate_multiple_endpoints(self, start_point, end_points, game_state):
+        """Finds the path a unit would take to reach a set of endpoints
+
+        Args:
+            * start_point: The starting location of the unit
+            * end_points: The end points of the unit, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            The path a unit at start_point would take when trying to reach end_points given the current game state.
+            Returns None if start_point is blocked or off the board.
+
+        """
+        if game_state.contains_stationary_unit(start_point) or board.cell_id(*start_point) < 0:
+            return
+        if self.cache_paths:
+            return self._cached_paths([start_point], end_points, game_state)[0]
+
+        self.initialize_map(game_state)
+        self._fill_blocked(game_state)
+        self._search_pocket(start_point, end_points)
+        return self._get_path(start_point, end_points)
+
+    def navigate_cells(self, start_cell, end_points, game_state):
+        """Like navigate_multiple_endpoints, but takes a cell id and returns the path as cell ids,
+        without building a list per step
+
+        """
+        if self.cache_paths:
+            return super().navigate_cells(start_cell, end_points, game_state)
+        if game_state.contains_stationary_unit_cell(start_cell):
+            return
+
+        self.initialize_map(game_state)
+        self._fill_blocked(game_state)
+        self._search_pocket(list(board.CELLS[start_cell]), end_points)
+        return self._get_path_cells(start_cell, end_points)
+
+    def _visited_idealness_at(self, location):
+        return self._visited_idealness[board.cell_id(*location)]
+
+    def set_blocked(self, location, blocked, end_points):
+        """Updates the pathlengths after a structure is placed at, or removed from, location, 
+        so that _get_path gives the path a unit would now take without initializing the map again
+
+        Only the pathlengths that change are repaired. Removing a structure shortens paths, which
+        spread out from the freed cell. Placing one lengthens the paths of the cells whose every
+        shortest route ran through it, which are found and given their new pathlengths from the cells
+        around them. A pocket is only searched again from scratch when its target may change: when it
+        is joined to another pocket, or split off from its edge or self destruct location.
+        The searched pockets end up exactly as a new search from the same start points would leave them.
+
+        Args:
+            * location: The location whose structure changed
+            * blocked: True if a structure was placed there, False if it was removed
+            * end_points: The end points of the last search
+
+        """
+        cell = board.cell_id(*location)
+        if cell < 0 or bool(self.blocked[cell]) == bool(blocked):
+            return
+        end_cells = {board.cell_id(x, y) for x, y in end_points}
+        if blocked:
+            self._block_cell(cell, end_cells, end_points)
+        else:
+            self._unblock_cell(cell, end_cells, end_points)
+
+    def _unblock_cell(self, cell, end_cells, end_points):
+        blocked = self.blocked
+        pathlength = self.pathlength
+        visited = self._visited_validate
+        neighbors = board.NEIGHBORS
+        open_neighbors = [neighbor for neighbor in neighbors[cell] if not blocked[neighbor]]
+        on_edge = self._edge_validated and cell in end_cells
+        if not on_edge and not any(visited[neighbor] for neighbor in open_neighbors):
+            # Not next to any pocket with pathlengths
+            blocked[cell] = 0
+            return
+
+        rooted = [neighbor for neighbor in open_neighbors if self._edge_rooted(neighbor, end_cells)]
+        if not (on_edge or (self._edge_validated and rooted)):
+            # Only pockets without a path to the edge are joined, the joined pocket may get a new target
+            blocked[cell] = 0
+            self._search_again(self._reset_pocket([cell]), end_points)
+            return
+
+        # The joined pocket paths to the edge. Pockets that did not are cleared and get their pathlengths 
+        # from the edge, every other pathlength can only get shorter, spreading out from the freed cell
+        self._reset_pocket([neighbor for neighbor in open_neighbors if neighbor not in rooted])
+        blocked[cell] = 0
+        pathlength[cell] = 0 if cell in end_cells else min(pathlength[neighbor] for neighbor in rooted) + 1
+        visited[cell] = 1
+        self._visited_idealness[cell] = 1
+        current = deque((cell,))
+        while current:
+            current_cell = current.popleft()
+            next_length = pathlength[current_cell] + 1
+            for neighbor in neighbors[current_cell]:
+                if blocked[neighbor] or (visited[neighbor] and pathlength[neighbor] <= next_length):
+                    continue
+                pathlength[neighbor] = next_length
+                visited[neighbor] = 1
+                self._visited_idealness[neighbor] = 1
+                current.append(neighbor)
+
+    def _block_cell(self, cell, end_cells, end_points):
+        blocked = self.blocked
+        pathlength = self.pathlength
+        visited = self._visited_validate
+        neighbors = board.NEIGHBORS
+        blocked[cell] = 1
+        if not visited[cell]:
+            return
+        if cell in end_cells:
+            # A blocked end point keeps its pathlength, like in _validate
+            old_length = 0
+        else:
+            old_length = pathlength[cell]
+            pathlength[cell] = -1
+            visited[cell] = 0
+            self._visited_idealness[cell] = 0
+            if old_length == 0:
+                # The self destruct location is gone, the rest of its pocket needs a new one
+                self._search_again(self._reset_pocket(neighbors[cell]), end_points)
+                return
+
+        # Find the cells whose every shortest route ran through cell, in order of their old pathlength
+        affected = {cell}
+        order = []
+        current = deque(((cell, old_length),))
+        while current:
+            current_cell, length = current.popleft()
+            for neighbor in neighbors[current_cell]:
+                if blocked[neighbor] or neighbor in affected or pathlength[neighbor] != length + 1:
+                    continue
+                if any(not blocked[parent] and parent not in affected and pathlength[parent] == length
+                       for parent in neighbors[neighbor]):
+                    continue
+                affected.add(neighbor)
+                order.append(neighbor)
+                current.append((neighbor, length + 1))
+
+        # Give them new pathlengths from the unaffected cells around them, shortest first
+        frontier = []
+        for affected_cell in order:
+            best = -1
+            for neighbor in neighbors[affected_cell]:
+                if not blocked[neighbor] and neighbor not in affected and (best < 0 or pathlength[neighbor] < best):
+                    best = pathlength[neighbor]
+            if best >= 0:
+                frontier.append((best + 1, affected_cell))
+        for affected_cell in order:
+            pathlength[affected_cell] = -1
+        heapq.heapify(frontier)
+        while frontier:
+            length, affected_cell = heapq.heappop(frontier)
+            if pathlength[affected_cell] >= 0:
+                continue
+            pathlength[affected_cell] = length
+            for neighbor in neighbors[affected_cell]:
+                if neighbor in affected and pathlength[neighbor] < 0 and not blocked[neighbor]:
+                    heapq.heappush(frontier, (length + 1, neighbor))
+
+        # Cells left without a pathlength were cut off from their target and form pockets of their own
+        cut_off = [affected_cell for affected_cell in order if pathlength[affected_cell] < 0]
+        if cut_off:
+            self._search_again(self._reset_pocket(cut_off), end_points)
+
+    def _edge_rooted(self, cell, end_cells):
+        """Whether a cell's pathlength counts the steps to the edge, rather than to a self destruct location
+        """
+        if not self._visited_validate[cell]:
+            return False
+        blocked = self.blocked
+        pathlength = self.pathlength
+        while pathlength[cell] > 0:
+            length = pathlength[cell] - 1
+            for neighbor in board.NEIGHBORS[cell]:
+                if not blocked[neighbor] and pathlength[neighbor] == length:
+                    cell = neighbor
+                    break
+            else:
+                return False
+        return cell in end_cells
+
+    def _reset_pocket(self, cells):
+        """Clears the search state of the pockets containing cells, returning their cells
+        """
+        blocked = self.blocked
+        pocket = [cell for cell in set(cells) if not blocked[cell]]
+        seen = set(pocket)
+        for current_cell in pocket:
+            for neighbor in board.NEIGHBORS[current_cell]:
+                if not blocked[neighbor] and neighbor not in seen:
+                    seen.add(neighbor)
+                    pocket.append(neighbor)
+        for current_cell in pocket:
+            self._visited_idealness[current_cell] = 0
+            self._visited_validate[current_cell] = 0
+            self.pathlength[current_cell] = -1
+        return pocket
+
+    def _search_again(self, cells, end_points):
+        for cell in cells:
+            if not self._visited_idealness[cell]:
+                ideal_tile = self._idealness_search(list(board.CELLS[cell]), end_points)
+                if ideal_tile in end_points:
+                    self._edge_validated = True
+                self._validate(ideal_tile, end_points)
+
+    def _fill_blocked(self, game_state):
+        blocked = self.blocked
+        for cell in board.mask_cells(game_state.game_map.blocked_mask()):
+            blocked[cell] = 1
+
+    def _idealness_search(self, start, end_points):
+        """
+        Finds the most ideal tile in our 'pocket' of pathable space. 
+        The edge if it is available, or the best self destruct location otherwise
+        """
+        blocked = self.blocked
+        visited = self._visited_idealness
+        table = self._idealness_table(end_points)
+
+        neighbors = board.NEIGHBORS
+        start_cell = board.cell_id(*start)
+        best_cell = start_cell
+        best_idealness = table[start_cell]
+        visited[start_cell] = 1
+        current = deque((start_cell,))
+
+        while current:
+            for neighbor in neighbors[current.popleft()]:
+                if blocked[neighbor]:
+                    continue
+                if table[neighbor] > best_idealness:
+                    best_idealness = table[neighbor]
+                    best_cell = neighbor
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    current.append(neighbor)
+
+        if best_cell == start_cell:
+            return start
+        return list(board.CELLS[best_cell])
+
+    def _validate(self, ideal_tile, end_points):
+        """Breadth first search of the grid, setting the pathlengths of each cell
+
+        """
+        blocked = self.blocked
+        visited = self._visited_validate
+        pathlength = self.pathlength
+        neighbors = board.NEIGHBORS
+        current = deque()
+        seeds = end_points if ideal_tile in end_points else [ideal_tile]
+        for x, y in seeds:
+            cell = board.cell_id(x, y)
+            pathlength[cell] = 0
+            visited[cell] = 1
+            current.append(cell)
+
+        while current:
+            cell = current.popleft()
+            if blocked[cell]:
+                continue
+            next_length = pathlength[cell] + 1
+            for neighbor in neighbors[cell]:
+                if blocked[neighbor] or visited[neighbor]:
+                    continue
+                pathlength[neighbor] = next_length
+                visited[neighbor] = 1
+                current.append(neighbor)
+
+    def get_pathlength(self, location):
+        """Gets the pathlength computed by the last search at a location, -1 if it was not reached
+
+        """
+        return self.pathlength[board.cell_id(*location)]
+
+    def next_step_cell(self, cell, previous_move_direction, end_points):
+        self._search_pocket(list(board.CELLS[cell]), end_points)
+        if self.pathlength[cell] == 0:
+            return cell
+        return self._choose_next_cell(cell, previous_move_direction, end_points)
+
+    def _get_path(self, start_point, end_points):
+        """Once all nodes are validated, and a target is found, the unit can path to its target
+
+        """
+        path = [start_point]
+        for cell in self._get_path_cells(board.cell_id(*start_point), end_points)[1:]:
+            path.append(list(board.CELLS[cell]))
+        return path
+
+    def _get_path_cells(self, start_cell, end_points):
+        """_get_path over cell ids, the locations passed to _better_direction are the (x, y) tuples of board.CELLS
+
+        """
+        cells = board.CELLS
+        pathlength = self.pathlength
+        path = [start_cell]
+        current = start_cell
+        move_direction = 0
+
+        while not pathlength[current] == 0:
+            next_cell = self._choose_next_cell(current, move_direction, end_points)
+            if cells[current][0] == cells[next_cell][0]:
+                move_direction = self.VERTICAL
+            else:
+                move_direction = self.HORIZONTAL
+            path.append(next_cell)
+            current = next_cell
+        return path
+
+    def _choose_next_move(self, current_point, previous_move_direction, end_points):
+        """Given the current location and adjacent locations, return the best 'next step' for a given unit to take
+        """
+        current_cell = board.cell_id(*current_point)
+        next_cell = self._choose_next_cell(current_cell, previous_move_direction, end_points)
+        if next_cell == current_cell:
+            return current_point
+        return list(board.CELLS[next_cell])
+
+    def _choose_next_cell(self, current_cell, previous_move_direction, end_points):
+        """Given the current cell and adjacent cells, return the best 'next step' for a given unit to take
+        """
+        blocked = self.blocked
+        pathlength = self.pathlength
+        cells = board.CELLS
+        current_point = cells[current_cell]
+        ideal_cell = current_cell
+        best_pathlength = pathlength[current_cell]
+        for cell in board.NEIGHBORS[current_cell]:
+            if blocked[cell]:
+                continue
+            current_pathlength = pathlength[cell]
+            if current_pathlength > best_pathlength:
+                continue
+            if current_pathlength == best_pathlength and not self._better_direction(current_point, cells[cell], cells[ideal_cell], previous_move_direction, end_points):
+                continue
+            ideal_cell = cell
+            best_pathlength = current_pathlength
+        return ideal_cell
+
+    def print_map(self):
+        """Prints an ASCII version of the current game map for debug purposes
+
+        """
+        if not self.initialized:
+            debug_write("Attempted to print_map before pathfinder initialization. Use 'this_object.initialize_map(game_state)' to initialize the map first")
+            return
+
+        for y in range(28):
+            for x in range(28):
+                cell = board.cell_id(x, 28 - y - 1)
+                if cell >= 0 and not self.blocked[cell] and not self.pathlength[cell] == -1:
+                    self._print_justified(self.pathlength[cell])
+                else:
+                    sys.stderr.write("   ")
+            debug_write("")
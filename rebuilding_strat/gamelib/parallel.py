@@ -0,0 +1,156 @@
+import json
+import multiprocessing
+import time
+
+from .catalog import UnitCatalog
+from .game_state import GameState
+from .simulation import Simulation
+from .util import debug_write
+
+# Set in each worker process by _init_worker
+_CONFIG = None
+_CATALOG = None
+_EMPTY_TURN = json.dumps({
+    "p1Units": [[] for _ in range(8)], "p2Units": [[] for _ in range(8)], "turnInfo": [0, 0, -1],
+    "p1Stats": [0, 0, 0, 0], "p2Stats": [0, 0, 0, 0], "events": {}})
+
+
+def _init_worker(config):
+    global _CONFIG, _CATALOG
+    _CONFIG = config
+    _CATALOG = UnitCatalog(config)
+
+
+def pack_units(game_state):
+    """Packs every unit on the map into a compact, picklable list
+
+    Returns:
+        A list of (unit_type, player_index, x, y, health, upgraded, pending_removal) tuples
+
+    """
+    packed = []
+    for location in game_state.game_map:
+        for unit in game_state.game_map[location]:
+            packed.append((unit.unit_type, unit.player_index, unit.x, unit.y, unit.health, unit.upgraded, unit.pending_removal))
+    return packed
+
+
+def unpack_units(config, packed, catalog=None):
+    """Builds a GameState holding the units packed by pack_units. Resources and turn info are left empty.
+    """
+    game_state = GameState(config, _EMPTY_TURN, catalog)
+    game_state.suppress_warnings(True)
+    game_map = game_state.game_map
+    for unit_type, player_index, x, y, health, upgraded, pending_removal in packed:
+        game_map.add_unit(unit_type, [x, y], player_index)
+        if upgraded:
+            game_map.upgrade_unit([x, y])
+        unit = game_map[x, y][-1]
+        unit.health = health
+        unit.pending_removal = pending_removal
+    return game_state
+
+
+def _ping(_):
+    return None
+
+
+def _simulate_chunk(task):
+    packed, candidates, amount_of_troops, unit_type, player_index, frame_accurate = task
+    sim = Simulation(unpack_units(_CONFIG, packed, _CATALOG), frame_accurate)
+    return [sim.simulate_path(location, amount_of_troops, unit_type, player_index, path) for location, path in candidates]
+
+
+class SimulationPool:
+    """A pool of worker processes that simulate attack paths in parallel
+
+    The workers are started once, usually from on_game_start with AlgoCore.start_worker_pool,
+    so no process start up cost is paid during turns. Each evaluation sends the board in the
+    compact form made by pack_units.
+
+    If the workers fail or run out of time, they are stopped, so that no leftover work delays the
+    next turn, and evaluations decline until revive starts new ones. AlgoCore calls revive
+    after each turn is submitted, so the new workers never start during a turn.
+
+    Attributes :
+        * processes (int): The number of worker processes
+        * overhead (float): The time, in seconds, a round trip to every already running worker took when the pool was started
+        * max_wait (float): The longest, in seconds, an evaluation waits for the workers when it is given no time_budget
+
+    """
+    def __init__(self, config, processes=None, max_wait=10.0):
+        self.processes = processes or max(1, multiprocessing.cpu_count() - 1)
+        self.max_wait = max_wait
+        self._config = config
+        self._pool = None
+        self._stopped_on_failure = False
+        self.overhead = 0.0
+        self._start()
+
+    def _start(self):
+        self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(self._config,))
+        # The first round trip also waits for the workers to start, only time the second one
+        self._pool.map(_ping, range(self.processes), 1)
+        start = time.time()
+        self._pool.map(_ping, range(self.processes), 1)
+        self.overhead = time.time() - start
+
+    def revive(self):
+        """Starts new workers if the last ones were stopped after failing or running out of time.
+        Call it outside of turns, it waits for the workers to start. If they can not be started,
+        the pool stays closed and simulate_paths always declines.
+
+        Returns:
+            True if the pool has workers
+        """
+        if self._stopped_on_failure:
+            self._stopped_on_failure = False
+            try:
+                self._start()
+            except Exception as e:
+                debug_write("Could not restart the simulation workers ({})".format(repr(e)))
+                self.close()
+        return self._pool is not None
+
+    def simulate_paths(self, sim, candidates, amount_of_troops, unit_type, player_index, time_budget=None):
+        """Simulates many attack paths on the board of a Simulation
+
+        Declines, returning None, when time_budget (in seconds) is too small to cover the round trip
+        to the workers, when the workers fail, or when they do not finish within time_budget.
+        The caller should then simulate in its own process.
+
+        Args:
+            sim: The Simulation whose board to use, with placements already applied
+            candidates: A list of (location, path) pairs
+            amount_of_troops, unit_type, player_index: As for Simulation.simulate_path
+            time_budget: The time left for this evaluation, max_wait if None
+
+        Returns:
+            The simulate_path result for each candidate, in order, or None
+
+        """
+        if self._pool is None or len(candidates) < 2 or (time_budget is not None and time_budget < 2 * self.overhead):
+            return None
+
+        packed = pack_units(sim.copy_game)
+        chunk_size = -(-len(candidates) // self.processes)
+        tasks = [(packed, candidates[i:i + chunk_size], amount_of_troops, unit_type, player_index, sim.frame_accurate) for i in range(0, len(candidates), chunk_size)]
+        try:
+            results = []
+            for chunk in self._pool.map_async(_simulate_chunk, tasks, 1).get(self.max_wait if time_budget is None else time_budget):
+                results.extend(chunk)
+            return results
+        except Exception as e:
+            debug_write("Simulation workers failed ({}), simulating in this process".format(repr(e)))
+            # Drop the work they still have, new workers are started by revive, outside the turn
+            self.close()
+            self._stopped_on_failure = True
+            return None
+
+    def close(self):
+        """Stops the worker processes
+        """
+        self._stopped_on_failure = False
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
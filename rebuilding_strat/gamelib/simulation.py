@@ -6,98 +6,245 @@ import copy
 
 import gamelib
 from .game_map import GameMap
-from .navigation import ShortestPathFinder
+from .navigation import ShortestPathFinder, ArrayShortestPathFinder
 from .game_state import GameState
 from .unit import GameUnit
+from .combat import CombatSimulator
+
+class UnitGroup:
+    """A stack of identical mobile units moving together, kept as a count instead of a list of GameUnits
+
+    Damage is always taken by the last unit of the stack and shields are given to every unit, 
+    so all the units but the last share one health. Moving the stack and damaging it is then 
+    constant time, however many units it holds, apart from one step per unit killed.
+
+    Attributes :
+        * unit (:obj: GameUnit): The first unit of the stack, its position is the stack's position
+        * count (int): The number of units left
+        * health (float): The health of every unit but the last
+        * last_health (float): The health of the last unit, the one taking damage
+
+    """
+    __slots__ = ("unit", "count", "health", "last_health")
+
+    def __init__(self, unit, count):
+        self.unit = unit
+        self.count = count
+        self.health = unit.health
+        self.last_health = unit.health
+
+    def move(self, location):
+        self.unit.x, self.unit.y = location[0], location[1]
+
+    def shield(self, amount):
+        """Adds amount to the health of every unit
+        """
+        self.health += amount
+        self.last_health += amount
+
+    def take_damage(self, damage):
+        """Deals damage to the units from the last one forward, the same as to a list of units
+        """
+        while damage > 0 and self.count > 0:
+            if self.last_health > damage:
+                self.last_health -= damage
+                return
+            damage -= self.last_health
+            self.count -= 1
+            self.last_health = self.health
+
 
 class Simulation():
 
-    def __init__(self, game_state):
+    def __init__(self, game_state, frame_accurate=False, cache=None):
+        """If frame_accurate is True, simulate_path runs the frame by frame CombatSimulator
+        instead of the faster per step estimate.
+        If a TranspositionCache is given, simulate_path results are stored in it keyed on the
+        board's ZobristHash, and reused whenever the same query is made on the same structures.
+        """
         self.orig_game = game_state
-        self.copy_game = GameState(self.orig_game.config, self.orig_game.serialized_string)
+        self.frame_accurate = frame_accurate
+        self.cache = cache
+        self.copy_game = self.orig_game.clone()
+        # Every simulation starts from this snapshot, which includes our placements and predicted enemy units
+        self.snapshot = self.copy_game.snapshot()
+        self.placements_updated = False
         self.supports = set()
+        # Follows the board during simulate_path_steps, so units re-path when structures die
+        self.path_finder = ArrayShortestPathFinder()
+        self._path_searched = False
+        self._path_changed = False
 
         
     def update_placements(self):
 
-        UPGRADE = self.orig_game.config["unitInformation"][7]["shorthand"]
+        if self.placements_updated:
+            return
+        UPGRADE = self.orig_game.catalog.UPGRADE
         for name, x, y in self.orig_game._build_stack:
             if name == UPGRADE:
-                self.copy_game.game_map[[x,y]][0].upgrade()
+                self.copy_game.game_map.upgrade_unit([x,y])
             else:
                 self.copy_game.game_map.add_unit(name, [x,y], 0)
+        self.placements_updated = True
+        # Built once here so that restoring the snapshot copies the threat map and hash instead of rebuilding them
+        self.copy_game.threat_map.build()
+        self.copy_game.zobrist.build()
+        self.snapshot = self.copy_game.snapshot()
 
 
-    def best_attack_path(self, location_options, amount_of_troops, mobile_unit, player_index):
+    def best_attack_path(self, location_options, amount_of_troops, mobile_unit, player_index, pool=None, budget=None):
         """
         This function will help us guess which location is the safest to spawn moving units from.
         It gets the path the unit will take then checks locations on that path to 
         estimate the path's damage risk.
+        If a SimulationPool is given, the locations are simulated in parallel on its workers.
+        If a TurnBudget is given, the search stops once it expires and returns the best location simulated so far.
         """
-        
-        paths = [self.simulate_path(location, amount_of_troops, mobile_unit, player_index) for location in self.get_attack_options(self.copy_game, player_index)]
+        self.update_placements()
+        locations = self.get_attack_options(self.copy_game, player_index)
+        # One shared search per target edge instead of one per spawn location
+        candidates = list(zip(locations, self.copy_game.find_paths_to_edge(locations)))
+        # Only simulate the candidates the cache has no result for
+        paths = [self._cached_result(location, amount_of_troops, mobile_unit, player_index) for location, _ in candidates]
+        missing = [candidate for candidate, result in zip(candidates, paths) if result is None]
+        simulated = None
+        if pool is not None and missing:
+            simulated = pool.simulate_paths(self, missing, amount_of_troops, mobile_unit, player_index, budget.remaining() if budget else None)
+            if simulated is not None and self.cache is not None:
+                for result in simulated:
+                    self.cache.put(self._cache_key(result[0], amount_of_troops, mobile_unit, player_index), result)
+        if simulated is None:
+            simulated = self.simulate_candidates(missing, amount_of_troops, mobile_unit, player_index, budget)
+        # Back in candidate order, so ties are broken the same way whether or not results came from the cache
+        order = {tuple(location): index for index, (location, _) in enumerate(candidates)}
+        for result in simulated:
+            paths[order[tuple(result[0])]] = result
+        paths = [result for result in paths if result is not None]
 
         return sorted(paths, key=lambda x: (x[2], -x[1]))[0]
+
+    def simulate_candidates(self, candidates, amount_of_troops, unit_type, player_index, budget=None):
+        """Runs simulate_path for each (location, path) candidate, in order.
+        If budget expires, the remaining candidates are skipped. The most promising candidates, 
+        those whose paths take the least structure damage, are simulated first so that 
+        a cut short search still returns a good answer. At least one candidate is always simulated.
+        """
+        if budget is None:
+            return [self.simulate_path(location, amount_of_troops, unit_type, player_index, path) for location, path in candidates]
+
+        threat_map = self.copy_game.threat_map
+        order = sorted(range(len(candidates)), key=lambda i: threat_map.get_path_damage(candidates[i][1], player_index))
+        results = {}
+        for i in order:
+            if results and budget.expired():
+                gamelib.debug_write("Turn budget expired after simulating {} of {} paths".format(len(results), len(candidates)))
+                break
+            location, path = candidates[i]
+            results[i] = self.simulate_path(location, amount_of_troops, unit_type, player_index, path)
+        # Back in candidate order, so ties are broken the same way as a full search
+        return [results[i] for i in sorted(results)]
         
-    def simulate_path(self, location, amount_of_troops, unit_type, player_index):
+    def _cache_key(self, location, amount_of_troops, unit_type, player_index):
+        return (self.copy_game.zobrist.value(), "simulate_path", tuple(location), amount_of_troops, unit_type, player_index, self.frame_accurate)
+
+    def _cached_result(self, location, amount_of_troops, unit_type, player_index):
+        """The simulate_path result stored in the cache for the current board, or None
+        """
+        if self.cache is None:
+            return None
         self.update_placements()
-        path_finder = ShortestPathFinder()
-        path_finder.initialize_map(self.copy_game)
+        result = self.cache.get(self._cache_key(location, amount_of_troops, unit_type, player_index))
+        if result is None:
+            return None
+        return (location,) + tuple(result[1:])
+
+    def simulate_path(self, location, amount_of_troops, unit_type, player_index, path=None):
+        """Simulates sending amount_of_troops units of unit_type from location along path, the path
+        the board gives if None. Returns (location, damage given, damage taken, damage to the opponent's health).
+        With a cache, a stored result is returned instead if the same query was made on the same structures.
+        """
+        self.update_placements()
+        result = self._cached_result(location, amount_of_troops, unit_type, player_index)
+        if result is not None:
+            return result
+        if self.frame_accurate:
+            result = self.simulate_path_frames(location, amount_of_troops, unit_type, player_index)
+        else:
+            result = self.simulate_path_steps(location, amount_of_troops, unit_type, player_index, path)
+        if self.cache is not None:
+            self.cache.put(self._cache_key(location, amount_of_troops, unit_type, player_index), result)
+        return result
+
+    def simulate_path_steps(self, location, amount_of_troops, unit_type, player_index, path=None):
+        """Same as simulate_path, stepping all the units along the path together, without the cache
+        """
+        self.update_placements()
+        if path is None:
+            path = self.copy_game.find_path_to_edge(location)
         target_edge = self.copy_game.get_target_edge(location)
         end_points = self.copy_game.game_map.get_edge_locations(target_edge)
-        path_finder.ideal_endpoints = path_finder._idealness_search(location, end_points)
-        path_finder._validate(path_finder.ideal_endpoints, end_points)
 
-        for _ in range(amount_of_troops):
-            self.copy_game.game_map.add_unit(unit_type, location, player_index)
+        unit = GameUnit(unit_type, self.copy_game.config, player_index, None, location[0], location[1], self.copy_game.catalog)
+        group = UnitGroup(unit, amount_of_troops)
         current = location
         self.supports = set()
+        self._path_searched = False
+        self._path_changed = False
 
-        damage_given, damage_taken, previous_move_direction = 0, 0, 0
+        damage_given, damage_taken = 0, 0
 
-        while (not path_finder.game_map[current[0]][current[1]].pathlength == 0) and len(self.copy_game.game_map[current])>0:
-            next_move = path_finder._choose_next_move(current, previous_move_direction, end_points)
-            if current[0] == next_move[0]:
-                previous_move_direction = path_finder.VERTICAL
-            else:
-                previous_move_direction = path_finder.HORIZONTAL
+        path_index = 1
+        while path_index < len(path):
+            next_move = path[path_index]
+            path_index += 1
+            if group.count == 0:
+                break
             # change 1 here:
-            self.move_units(current, next_move)
+            group.move(next_move)
             current = next_move
             
-            turn = self.damage_calculations(current, 0, path_finder, location, end_points)
+            turn = self.damage_calculations(group, current, player_index, self.path_finder, location, end_points)
             damage_given += turn['target_damage']
             damage_taken += turn['net_damage']
+            if self._path_changed:
+                # Structures died, carry on along the path the units would now take from here
+                path = self.path_finder._get_path(current, end_points)
+                path_index = 1
+                self._path_changed = False
 
 
-        damage_to_opponent_health = len(self.copy_game.game_map[current])
-        self.copy_game = GameState(self.orig_game.config, self.orig_game.serialized_string)
+        damage_to_opponent_health = group.count
+        self.copy_game.restore(self.snapshot)
         
         return (location, damage_given, damage_taken, damage_to_opponent_health)
         
 
-    def move_units(self, location_1, location_2):
-        for unit in tuple(self.copy_game.game_map[location_1]):
-            self.copy_game.game_map[location_2].append(unit)
-            self.copy_game.game_map[location_1].pop(0)
-            unit.x,unit.y = location_2[0], location_2[1]
+    def simulate_path_frames(self, location, amount_of_troops, unit_type, player_index):
+        """Same as simulate_path, using the CombatSimulator. The units find their own path, 
+        re-pathing as structures are destroyed, so no path is taken.
+        """
+        self.update_placements()
+        result = CombatSimulator(self.copy_game).simulate([(unit_type, location, player_index, amount_of_troops)])
+        return (location, result['structure_damage'][player_index], result['damage_taken'][player_index], result['breaches'][player_index])
 
-    def damage_calculations(self, location, player_index, nav, spawn_location, end_points):
+    def damage_calculations(self, group, location, player_index, nav, spawn_location, end_points):
+        """One step of the units of group at location: supports shield them, they attack, then structures attack them
+        """
         supports = self.copy_game.get_shielders(location, player_index)
-        attackers = self.copy_game.get_attackers(location, player_index)
         net_damage = 0 
         for support in supports:
             if (support.x, support.y) not in self.supports:
-                for unit in self.copy_game.game_map[location]:
-                    unit.health+=(support.shieldPerUnit + support.shieldBonusPerY*support.y)
-                    net_damage -= (support.shieldPerUnit + support.shieldBonusPerY*support.y)
+                shield = support.shield_amount()
+                group.shield(shield)
+                net_damage -= shield * group.count
                 self.supports.add((support.x, support.y))
 
-        total_damage = sum([unit.damage_i for unit in attackers])
+        total_damage = self.copy_game.threat_map.get_damage(location, player_index)
         net_damage+=total_damage
 
-        target = self.copy_game.get_target(self.copy_game.game_map[location][0])
-        target_damage = self.copy_game.game_map[location][0].damage_f * len(self.copy_game.game_map[location])
+        target = self.copy_game.get_target(group.unit)
+        target_damage = group.unit.damage_f * group.count
 
         
         while target and target_damage>0:
@@ -107,20 +254,15 @@ class Simulation():
                 target_damage = 0
             else:
                 target_damage -= target.health
-                self.copy_game.game_map[[target.x, target.y]].pop()
-                target = self.copy_game.get_target(self.copy_game.game_map[location][0])
-            # COMMENTED OUT HERE
-            # nav.ideal_endpoints = nav._idealness_search(spawn_location, end_points)
-            # nav._validate(nav.ideal_endpoints, end_points)
+                if target.stationary:
+                    self.copy_game.game_map.remove_unit([target.x, target.y])
+                    self.structure_destroyed(nav, [target.x, target.y], location, end_points)
+                else:
+                    self.copy_game.game_map[[target.x, target.y]].pop()
+                target = self.copy_game.get_target(group.unit)
 
         # change 3: moved after while above
-        while total_damage>0 and len(self.copy_game.game_map[location])>0:
-            if self.copy_game.game_map[location][-1].health>total_damage:
-                self.copy_game.game_map[location][-1].health -= total_damage
-                break
-            else:
-                total_damage -= self.copy_game.game_map[location][-1].health
-                self.copy_game.game_map[location].pop()
+        group.take_damage(total_damage)
 
         
         return {'net_damage': net_damage, 'target_damage': target_damage}
@@ -128,6 +270,18 @@ class Simulation():
     
 
 
+    def structure_destroyed(self, nav, location, current, end_points):
+        """Updates nav's pathlengths after the structure at location died, for units at current.
+        The board is searched at the first death of a simulated path, later deaths only repair 
+        the pathlengths around the freed cell with set_blocked.
+        """
+        if self._path_searched:
+            nav.set_blocked(location, False, end_points)
+        else:
+            nav.navigate_multiple_endpoints(current, end_points, self.copy_game)
+            self._path_searched = True
+        self._path_changed = True
+
     def get_attack_options(self,game_state, player_index):
         """returns locations where mobile units can be
         spawned for given player"""
@@ -157,6 +311,7 @@ class Simulation():
 
     def place_predicted_units(self, list_of_units):
         for unit, location, upgrade_status in list_of_units:
-            self.copy_game.game_map.add_unit(self.copy_game.config["unitInformation"][unit]["shorthand"], location, 1)
+            self.copy_game.game_map.add_unit(self.copy_game.catalog.UNIT_TYPES[unit], location, 1)
             if upgrade_status:
-                self.copy_game.game_map[[location]][0].upgrade()
\ No newline at end of file
+                self.copy_game.game_map.upgrade_unit(location)
+        self.snapshot = self.copy_game.snapshot()
\ No newline at end of file
@@ -1,7 +1,11 @@
 import unittest
 import json
+import math
+import random
 from .game_state import GameState
 from .unit import GameUnit
+from .navigation import ShortestPathFinder, ArrayShortestPathFinder
+from . import board
 
 class BasicTests(unittest.TestCase):
 
@@ -215,6 +219,22 @@ class BasicTests(unittest.TestCase):
         self.assertEqual([("DF", 13, 6)], game._build_stack, "Build queue is wrong!")
         self.assertEqual([("SI", 13, 0), ("SI", 13, 0), ("SI", 13, 0)], game._deploy_stack, "Deploy queue is wrong!")
 
+    def test_bulk_spawn(self):
+        bulk = self.make_turn_0_map()
+        single = self.make_turn_0_map()
+        self.assertEqual(5, bulk.attempt_spawn("PI", [[13, 0], [14, 0]], 3), "Every affordable unit should be spawned")
+        for location in [[13, 0], [14, 0]]:
+            for _ in range(3):
+                single.attempt_spawn("PI", location)
+        self.assertEqual(single._deploy_stack, bulk._deploy_stack)
+        self.assertEqual(single.get_resources(), bulk.get_resources())
+        for location in [[13, 0], [14, 0]]:
+            self.assertEqual([(u.unit_type, u.health, u.x, u.y) for u in single.game_map[location]],
+                             [(u.unit_type, u.health, u.x, u.y) for u in bulk.game_map[location]])
+        bulk.game_map[13, 0][0].health = 1
+        self.assertEqual(15, bulk.game_map[13, 0][1].health, "Spawned units should not share state")
+        self.assertEqual(1, bulk.attempt_spawn("FF", [3, 13], 4), "Only one structure fits in a location")
+
     def test_trivial_functions(self):
         game = self.make_turn_0_map()
 
@@ -225,6 +245,86 @@ class BasicTests(unittest.TestCase):
         self.assertEqual(0, len(game.game_map.get_locations_in_range([-500,-500], 10)), "Invalid tiles are being marked as in range")
         self.assertEqual(1, len(game.game_map.get_locations_in_range([13,13], 0)), "A location should be in range of itself")
     
+    def test_board_tables(self):
+        game = self.make_turn_0_map()
+        self.assertEqual(420, board.CELL_COUNT, "The board should have 420 locations")
+        self.assertEqual([list(cell) for cell in board.CELLS], [location for location in game.game_map], "Cells should follow map iteration order")
+        self.assertFalse(game.game_map.in_arena_bounds([12, 0]), "[12, 0] is off the board")
+        self.assertTrue(game.game_map.in_arena_bounds([0, 13]), "[0, 13] is on the board")
+        self.assertEqual(board.BOTTOM_RIGHT, board.EDGE_OF[(27, 13)], "[27, 13] is on the bottom right edge")
+        for cell, (x, y) in enumerate(board.CELLS):
+            self.assertEqual(cell, board.cell_id(x, y))
+            for neighbor in board.NEIGHBORS[cell]:
+                nx, ny = board.CELLS[neighbor]
+                self.assertEqual(1, abs(nx - x) + abs(ny - y))
+
+    def test_cell_ids(self):
+        game = self.make_random_walls(self.make_turn_0_map(), 0)
+        for location in random.Random(0).sample([location for location in game.game_map if location[1] >= 14], 30):
+            if not game.contains_stationary_unit(location):
+                game.game_map.add_unit("DF", location, 1)
+        game_map = game.game_map
+        for edge in range(4):
+            self.assertEqual([board.cell_of(location) for location in game_map.get_edge_locations(edge)], list(game_map.get_edge_cells(edge)))
+            self.assertEqual(sorted(board.EDGE_CELL_SETS[edge]), board.mask_cells(board.EDGE_MASKS[edge]))
+        self.assertEqual(0, board.SIDE_MASKS[0] & board.SIDE_MASKS[1], "The halves of the board overlap")
+        self.assertEqual((1 << board.CELL_COUNT) - 1, board.SIDE_MASKS[0] | board.SIDE_MASKS[1], "The halves should cover the board")
+        self.assertEqual(-1, board.cell_of([12, 0]))
+
+        for cell, location in enumerate(board.CELLS):
+            self.assertIs(game_map[location], game_map.units_at_cell(cell))
+            self.assertEqual(game.contains_stationary_unit(location), game.contains_stationary_unit_cell(cell))
+            self.assertEqual([board.cell_of(in_range) for in_range in game_map.get_locations_in_range(location, 3.5)], list(game_map.get_cells_in_range(cell, 3.5)))
+            expected = [unit for in_range in game_map.get_locations_in_range(location, 4.5) for unit in game_map[in_range]
+                        if unit.damage_i > 0 and unit.player_index != 0 and game_map.distance_between_locations(location, in_range) <= unit.attackRange]
+            self.assertEqual(expected, game.get_attackers(list(location), 0))
+
+        edges = game_map.get_edges()
+        for finder in [ShortestPathFinder(), ArrayShortestPathFinder()]:
+            game.set_path_finder(finder)
+            for location in edges[2] + edges[3]:
+                path = game.find_path_to_edge(location)
+                cells = game.find_path_to_edge_cells(board.cell_of(location))
+                self.assertEqual(None if path is None else [board.cell_of(step) for step in path], cells, "Cell path differs at {}".format(location))
+
+    def test_structure_index(self):
+        def expected_cells(game_map, player_index, unit_type=None, region=None):
+            return [cell for cell, location in enumerate(board.CELLS) for unit in game_map[location]
+                    if unit.stationary and unit.player_index == player_index and unit_type in (None, unit.unit_type)
+                    and (region is None or region >> cell & 1)]
+
+        game = self.make_random_walls(self.make_turn_0_map(), 0, count=60)
+        game_map = game.game_map
+        rng = random.Random(0)
+        region = board.region_mask(5, 20, 8, 19)
+        for step in range(40):
+            if step == 20:
+                game_map = game_map.copy()
+            for player_index in [0, 1]:
+                for unit_type in [None, "FF", "DF"]:
+                    self.assertEqual(expected_cells(game_map, player_index, unit_type), game_map.structure_cells(player_index, unit_type))
+                    self.assertEqual(expected_cells(game_map, player_index, unit_type, region), game_map.structure_cells(player_index, unit_type, region))
+            self.assertEqual(board.cells_mask(expected_cells(game_map, 0) + expected_cells(game_map, 1)), game_map.blocked_mask())
+            self.assertEqual([list(board.CELLS[cell]) for cell in expected_cells(game_map, 1)], [[unit.x, unit.y] for unit in game_map.structures(1)])
+            for location in rng.sample([location for location in game_map], 6):
+                if rng.random() < 0.4:
+                    game_map.remove_unit(location)
+                else:
+                    game_map.add_unit(rng.choice(["FF", "DF", "EI"]), location, 0 if location[1] < 14 else 1)
+
+        game_map[13, 13] = [GameUnit("DF", game_map.config, 1, None, 13, 13)]
+        self.assertIn(board.cell_id(13, 13), game_map.structure_cells(1, "DF"), "Setting a location should be seen by the index")
+
+    def test_float_locations(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("FF", [13, 5], 0)
+        self.assertTrue(game.game_map.in_arena_bounds([13.0, 5.0]))
+        self.assertFalse(board.in_arena_bounds([12.0, 0.0]))
+        self.assertEqual([board.in_arena_bounds(location) for location in game.game_map], [board.in_arena_bounds([float(x), float(y)]) for x, y in game.game_map])
+        self.assertTrue(game.contains_stationary_unit([13.0, 5.0]))
+        self.assertEqual([[float(x), float(y)] for x, y in game.game_map.get_locations_in_range([13, 13], 3.5)],
+                         game.game_map.get_locations_in_range([13.0, 13.0], 3.5))
+
     def test_get_units(self):
         game = self.make_turn_0_map()
         self.assertEqual(0, len(game.game_map[13,13]), "There should not be a unit on this location")
@@ -240,6 +340,23 @@ class BasicTests(unittest.TestCase):
         self.assertEqual(1, len(game.game_map.get_locations_in_range([13,13], 0)), "We should be in 0 range of ourself")
         self.assertEqual(37, len(game.game_map.get_locations_in_range([13,13], 3.5)), "Wrong number of tiles in range")
 
+    def test_cached_locations_in_range(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        for radius in [0, 1, 2.5, 3.5, 4.5, 7]:
+            for location in [[13, 0], [0, 13], [13, 13], [20, 20], [27, 14]]:
+                x, y = location
+                search_radius = math.ceil(radius)
+                expected = [[i, j] for i in range(x - search_radius, x + search_radius + 1) for j in range(y - search_radius, y + search_radius + 1)
+                            if game_map.in_arena_bounds([i, j]) and game_map.distance_between_locations(location, [i, j]) < radius + 0.01]
+                for _ in range(2):
+                    self.assertEqual(expected, game_map.get_locations_in_range(location, radius), "Wrong tiles in range {} of {}".format(radius, location))
+
+        # Changing the returned locations must not change later results, even on other maps
+        in_range = game_map.get_locations_in_range([13, 13], 1)
+        in_range[1][0] = 0
+        self.assertEqual([13, 12], self.make_turn_0_map().game_map.get_locations_in_range([13, 13], 1)[1])
+
     def _test_get_attackers(self):
         game = self.make_turn_0_map()
         
@@ -256,6 +373,453 @@ class BasicTests(unittest.TestCase):
         game.game_map.add_unit("DF", [14,14], 1)
         self.assertEqual(3, len(game.get_attackers([13,13], 0)), "We should be in danger from 3 places")
 
+    def make_random_walls(self, game, seed, count=120):
+        rng = random.Random(seed)
+        locations = [location for location in game.game_map]
+        for location in rng.sample(locations, count):
+            game.game_map.add_unit("FF", location, 0 if location[1] < 14 else 1)
+        return game
+
+    def test_array_path_finder_matches(self):
+        for seed in range(5):
+            game = self.make_random_walls(self.make_turn_0_map(), seed)
+            edges = game.game_map.get_edges()
+            for location in edges[0] + edges[1] + edges[2] + edges[3]:
+                game.set_path_finder(ShortestPathFinder())
+                expected = game.find_path_to_edge(location)
+                game.set_path_finder(ArrayShortestPathFinder())
+                self.assertEqual(expected, game.find_path_to_edge(location), "Array path finder disagrees at {}".format(location))
+
+    def test_next_step_cell(self):
+        game = self.make_random_walls(self.make_turn_0_map(), 3)
+        for location in game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT)[::3]:
+            if game.contains_stationary_unit(location):
+                continue
+            expected = game.find_path_to_edge(location)
+            end_points = game.game_map.get_edge_locations(game.get_target_edge(location))
+            for finder in (ShortestPathFinder(), ArrayShortestPathFinder()):
+                finder.initialize_map(game)
+                finder._fill_blocked(game)
+                cell, direction = board.cell_id(*location), 0
+                path = [cell]
+                while True:
+                    next_cell = finder.next_step_cell(cell, direction, end_points)
+                    if next_cell == cell:
+                        break
+                    direction = finder.VERTICAL if board.CELLS[cell][0] == board.CELLS[next_cell][0] else finder.HORIZONTAL
+                    path.append(next_cell)
+                    cell = next_cell
+                self.assertEqual(expected, [list(board.CELLS[cell]) for cell in path], "{} should step along the path".format(type(finder).__name__))
+
+    def test_idealness_tables(self):
+        game = self.make_turn_0_map()
+        finder = ShortestPathFinder()
+        finder.initialize_map(game)
+        for edge, end_points in enumerate(game.game_map.get_edges()):
+            self.assertIs(board.IDEALNESS[edge], finder._idealness_table(end_points))
+            self.assertEqual([finder._get_idealness(list(location), end_points) for location in board.CELLS], list(board.IDEALNESS[edge]))
+
+        for seed in range(5):
+            game = self.make_random_walls(self.make_turn_0_map(), seed, count=150)
+            edges = game.game_map.get_edges()
+            for location in edges[2] + edges[3]:
+                tile = game.find_best_reachable_tile(location)
+                path = game.find_path_to_edge(location)
+                if path is None:
+                    self.assertIsNone(tile)
+                    continue
+                end_points = edges[game.get_target_edge(location)]
+                self.assertEqual(path[-1] in end_points, tile in end_points, "Best tile {} disagrees with path at {}".format(tile, location))
+                if tile not in end_points:
+                    self.assertEqual(path[-1], tile, "Wrong self destruct location at {}".format(location))
+
+    def test_navigate_all_starts(self):
+        for seed in range(5):
+            game = self.make_random_walls(self.make_turn_0_map(), seed)
+            edges = game.game_map.get_edges()
+            starts = edges[2] + edges[3]
+            for finder in [ShortestPathFinder(), ArrayShortestPathFinder()]:
+                game.set_path_finder(finder)
+                expected = [game.find_path_to_edge(location) for location in starts]
+                self.assertEqual(expected, game.find_paths_to_edge(starts), "Batched paths differ from single paths")
+
+    def test_path_cache(self):
+        for seed in range(3):
+            rng = random.Random(seed)
+            game = self.make_random_walls(self.make_turn_0_map(), seed, count=80)
+            edges = game.game_map.get_edges()
+            starts = edges[0] + edges[1] + edges[2] + edges[3]
+            for finder in [ShortestPathFinder(cache_paths=True), ArrayShortestPathFinder(cache_paths=True)]:
+                for _ in range(6):
+                    game.set_path_finder(finder)
+                    cached = game.find_paths_to_edge(starts)
+                    single = [game.find_path_to_edge(location) for location in starts]
+                    game.set_path_finder(ArrayShortestPathFinder())
+                    expected = game.find_paths_to_edge(starts)
+                    self.assertEqual(expected, cached, "Cached paths are stale")
+                    self.assertEqual(expected, single, "Cached single paths are stale")
+                    for location in rng.sample([location for location in game.game_map], 4):
+                        if game.contains_stationary_unit(location):
+                            game.game_map.remove_unit(location)
+                        else:
+                            game.game_map.add_unit("FF", location, 0)
+
+        # A wall far from a pocket keeps its paths
+        game = self.make_turn_0_map()
+        for x in range(28):
+            if game.game_map.in_arena_bounds([x, 14]):
+                game.game_map.add_unit("FF", [x, 14], 1)
+        finder = ArrayShortestPathFinder(cache_paths=True)
+        game.set_path_finder(finder)
+        edges = game.game_map.get_edges()
+        game.find_paths_to_edge(edges[2] + edges[3])
+        game.game_map.add_unit("FF", [13, 20], 1)
+        game.find_paths_to_edge(edges[2] + edges[3])
+        self.assertEqual(28, len(finder._path_cache))
+        game.game_map.remove_unit([13, 14])
+        game.find_path_to_edge([13, 0])
+        self.assertEqual(1, len(finder._path_cache))
+
+    def test_set_blocked(self):
+        for seed in range(4):
+            rng = random.Random(seed)
+            game = self.make_random_walls(self.make_turn_0_map(), seed, count=90 + 20 * seed)
+            edges = game.game_map.get_edges()
+            starts = [location for location in edges[2] + edges[3] if not game.contains_stationary_unit(location)]
+            cells = [location for location in game.game_map if location not in starts]
+            for edge in [game.game_map.TOP_LEFT, game.game_map.TOP_RIGHT]:
+                end_points = game.game_map.get_edge_locations(edge)
+                for finder in [ShortestPathFinder(), ArrayShortestPathFinder()]:
+                    state = game.clone()
+                    finder.navigate_all_starts(starts, edge, state)
+                    for location in rng.sample(cells, 40):
+                        if state.contains_stationary_unit(location):
+                            state.game_map.remove_unit(location)
+                            finder.set_blocked(location, False, end_points)
+                        else:
+                            state.game_map.add_unit("FF", location, 0)
+                            finder.set_blocked(location, True, end_points)
+                        expected = ArrayShortestPathFinder().navigate_all_starts(starts, edge, state)
+                        self.assertEqual(expected, [finder._get_path(start, end_points) for start in starts],
+                                         "Repaired path differs after changing {}".format(location))
+
+    def test_threat_map(self):
+        game = self.make_random_walls(self.make_turn_0_map(), 3, count=40)
+        for location in [[10, 10], [13, 12], [16, 15], [5, 16], [20, 12]]:
+            game.game_map.add_unit("DF", location, 0 if location[1] < 14 else 1)
+        game.threat_map.get_damage([13, 13], 0)
+        game.game_map.add_unit("DF", [12, 14], 1)
+        game.game_map.upgrade_unit([16, 15])
+        game.game_map.remove_unit([13, 12])
+        game.game_map.add_unit("FF", [20, 12], 0)
+        game.game_map[13, 14] = [GameUnit("DF", game.config, 1)]
+        game.game_map[10, 10] = []
+        for x, y in board.CELLS:
+            for player_index in [0, 1]:
+                expected = game.get_attackers([x, y], player_index)
+                self.assertEqual(expected, game.threat_map.get_attackers([x, y], player_index), "Threat map attackers are stale at {}".format([x, y]))
+                self.assertEqual(sum(unit.damage_i for unit in expected), game.threat_map.get_damage([x, y], player_index))
+
+    def test_clone_and_restore(self):
+        game = self.make_random_walls(self.make_turn_0_map(), 4, count=30)
+        game.game_map.add_unit("DF", [13, 12], 0)
+        clone = game.clone()
+        clone.attempt_spawn("DF", [13, 6])
+        clone.game_map[13, 12][0].health = 1
+        clone.game_map.remove_unit([13, 12])
+        self.assertEqual(1, len(game.game_map[13, 12]), "Removing from a clone changed the original")
+        self.assertEqual(90, game.game_map[13, 12][0].health, "Damaging a clone changed the original")
+        self.assertEqual([], game._build_stack, "Spawning on a clone changed the original")
+        self.assertEqual(25, game.get_resource(game.SP), "Spawning on a clone spent the original's resources")
+
+        snapshot = game.snapshot()
+        for _ in range(2):
+            game.attempt_spawn("DF", [13, 6])
+            game.game_map.upgrade_unit([13, 12])
+            game.restore(snapshot)
+            self.assertEqual(0, len(game.game_map[13, 6]), "Restore did not remove the new structure")
+            self.assertFalse(game.game_map[13, 12][0].upgraded, "Restore did not undo the upgrade")
+            self.assertEqual(25, game.get_resource(game.SP), "Restore did not refund resources")
+            self.assertEqual(game.get_attackers([13, 14], 1), game.threat_map.get_attackers([13, 14], 1))
+
+        finder = ArrayShortestPathFinder(cache_paths=True)
+        game.set_path_finder(finder)
+        starts = game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT)
+        expected = game.find_paths_to_edge(starts)
+        cached = dict(finder._path_cache)
+        clone = game.clone()
+        self.assertIsNot(finder, clone._shortest_path_finder, "Clones should get a path finder of their own")
+        for x in range(4, 24):
+            clone.game_map.add_unit("FF", [x, 11], 0)
+        clone.find_paths_to_edge(starts)
+        self.assertEqual(cached, finder._path_cache, "Searching on a clone changed the original's path cache")
+        self.assertEqual(expected, game.find_paths_to_edge(starts))
+
+    def test_parallel_simulation(self):
+        from .parallel import SimulationPool, pack_units, unpack_units
+        from .simulation import Simulation
+        game = self.make_random_walls(self.make_turn_0_map(), 6, count=40)
+        for location in [[10, 15], [13, 16], [16, 15], [5, 16], [20, 17]]:
+            game.game_map.add_unit("DF", location, 1)
+        game.game_map.upgrade_unit([13, 16])
+        self.assertEqual(pack_units(game), pack_units(unpack_units(game.config, pack_units(game))), "Packed board does not round trip")
+
+        expected = Simulation(game).best_attack_path(None, 5, "PI", 0)
+        pool = SimulationPool(game.config, 2)
+        try:
+            self.assertEqual(expected, Simulation(game).best_attack_path(None, 5, "PI", 0, pool=pool), "Parallel simulation disagrees")
+            # A timed out evaluation declines, and the restarted workers are not held up by its leftover work
+            sim = Simulation(game)
+            sim.update_placements()
+            candidates = [(location, game.find_path_to_edge(location)) for location in [[13, 0], [14, 0], [10, 3]]]
+            pool.overhead = 0
+            self.assertIsNone(pool.simulate_paths(sim, candidates * 50, 5, "PI", 0, time_budget=0.0001))
+            self.assertIsNone(pool.simulate_paths(sim, candidates, 5, "PI", 0), "Stopped workers should not be restarted during a turn")
+            self.assertTrue(pool.revive())
+            self.assertEqual(expected, Simulation(game).best_attack_path(None, 5, "PI", 0, pool=pool), "Restarted workers disagree")
+        finally:
+            pool.close()
+
+    def test_turn_budget(self):
+        from .budget import TurnBudget
+        from .simulation import Simulation
+        game = self.make_random_walls(self.make_turn_0_map(), 6, count=40)
+        expected = Simulation(game).best_attack_path(None, 5, "PI", 0)
+        self.assertEqual(expected, Simulation(game).best_attack_path(None, 5, "PI", 0, budget=TurnBudget(60)), "A generous budget should not change the result")
+
+        budget = TurnBudget(0)
+        self.assertTrue(budget.expired())
+        self.assertEqual(0, budget.remaining())
+        sim = Simulation(game)
+        calls = []
+        simulate_path = sim.simulate_path
+        sim.simulate_path = lambda *args: calls.append(args) or simulate_path(*args)
+        self.assertIsNotNone(sim.best_attack_path(None, 5, "PI", 0, budget=budget), "An expired budget should still return a location")
+        self.assertEqual(1, len(calls), "An expired budget should stop after the first simulation")
+
+    def test_get_targets(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 13], 0)
+        game.game_map.add_unit("FF", [14, 14], 1)
+        game.game_map.add_unit("PI", [13, 15], 1)
+        game.game_map.add_unit("PI", [12, 14], 1)
+        game.game_map[12, 14][0].health = 5
+        destructor = game.game_map[13, 13][0]
+        ping = game.game_map[13, 15][0]
+        self.assertIs(game.game_map[12, 14][0], game.get_target(destructor), "Nearest then lowest health mobile unit first")
+        self.assertIs(destructor, game.get_target(ping), "Units never target their own side")
+        self.assertEqual([game.get_target(destructor), game.get_target(ping), None],
+                         game.get_targets([destructor, ping, game.game_map[14, 14][0]]))
+
+    def test_parsed_message(self):
+        from .util import ParsedMessage, decode_message
+        game = self.make_turn_0_map()
+        message = ParsedMessage(game.serialized_string)
+        self.assertEqual(game.serialized_string, message, "A ParsedMessage should still be the raw string")
+        self.assertIs(message.state, decode_message(message), "A ParsedMessage should not be decoded again")
+        self.assertEqual(json.loads(game.serialized_string), decode_message(game.serialized_string))
+        self.assertEqual(game.get_resources(0), GameState(game.config, message).get_resources(0))
+
+    def test_action_frame_filter(self):
+        from .algocore import AlgoCore
+        from .util import has_events, peek_turn_type
+        quiet = '{"turnInfo":[1,3,4],"events":{"breach":[],"death":[]}}'
+        death = '{"turnInfo":[1,3,5],"events":{"breach": [ ],"death":[[[3,14],2,"1",2,false]]}}'
+        self.assertEqual(1, peek_turn_type(death))
+        self.assertIsNone(peek_turn_type('{"events":{}}'))
+        self.assertFalse(has_events(quiet, ["breach", "death"]))
+        self.assertTrue(has_events(death, ["breach", "death"]))
+        self.assertFalse(has_events(death, ["breach", "spawn"]))
+
+        core = AlgoCore()
+        frames = []
+        core.on_action_frame = lambda frame: frames.append(frame.state["turnInfo"][2])
+        core.action_frame_events = ["death"]
+        core.batch_action_frames = True
+        self.assertTrue(core._defer_action_frame(quiet), "Frames without the events should be skipped")
+        self.assertTrue(core._defer_action_frame(death), "Frames with the events should be queued")
+        self.assertFalse(core._defer_action_frame(self.make_turn_0_map().serialized_string), "Turns are never deferred")
+        self.assertEqual([], frames)
+        core.flush_action_frames()
+        self.assertEqual([5], frames)
+
+    def test_unit_catalog(self):
+        import copy
+        from .catalog import UnitCatalog
+        game = self.make_turn_0_map()
+        catalog = game.catalog
+        self.assertIs(catalog, game.game_map.catalog, "The map should share its state's catalog")
+        self.assertIs(catalog, game.clone().catalog)
+        self.assertIs(catalog, GameUnit("DF", game.config).catalog, "Units made without a catalog should share their config's")
+        config = copy.deepcopy(game.config)
+        config["unitInformation"][2]["attackRange"] = 3.0
+        self.assertEqual(3.0, GameState(config, game.serialized_string).catalog.stats["DF", False].attackRange, "Another config should get its own catalog")
+        self.assertEqual(2.5, catalog.stats["DF", False].attackRange)
+        configs = [copy.deepcopy(game.config) for _ in range(20)]
+        for config in configs:
+            UnitCatalog.for_config(config)
+        from .catalog import _CATALOGS
+        self.assertLessEqual(len(_CATALOGS), 8, "Only a few catalogs should be kept")
+        self.assertEqual(("FF", "PI", 2, 7), (catalog.WALL, catalog.SCOUT, catalog.UNIT_TYPE_TO_INDEX["DF"], catalog.UNIT_TYPE_TO_INDEX["UP"]))
+        self.assertTrue(catalog.is_stationary("DF"))
+        self.assertFalse(catalog.is_stationary("PI"))
+        self.assertEqual([4.0, 0], game.type_cost("DF", True))
+        self.assertEqual([1.0, 0], game.type_cost("FF", True), "The upgrade cost should fall back to the base cost")
+        with self.assertRaises(AttributeError):
+            catalog.WALL = "DF"
+        game.game_map.add_unit("DF", [13, 13], 0)
+        turret = game.game_map[13, 13][0]
+        self.assertFalse(hasattr(turret, "__dict__"), "GameUnit should use __slots__")
+        self.assertEqual((2.5, 5.0, 90.0, [2.0, 0]), (turret.attackRange, turret.damage_i, turret.health, turret.cost))
+
+        clone = copy.copy(turret)
+        game.game_map.upgrade_unit([13, 13])
+        self.assertEqual((3.5, 15.0, [6.0, 0], True), (turret.attackRange, turret.damage_i, turret.cost, turret.upgraded))
+        self.assertEqual((2.5, False), (clone.attackRange, clone.upgraded), "Copies should not share upgrades")
+
+    def test_compact_board(self):
+        from .compact_board import CompactBoard
+        game = self.make_random_walls(self.make_turn_0_map(), 8, count=60)
+        game.game_map.add_unit("DF", [13, 13], 0)
+        game.game_map.upgrade_unit([13, 13])
+        game.game_map[13, 13][0].health = 12.5
+        game.game_map.add_unit("PI", [13, 0], 0)
+
+        compact = CompactBoard.from_game_map(game.game_map)
+        self.assertEqual((0, 2, 12.5, True), compact.get([13, 13]))
+        self.assertIsNone(compact.get([13, 0]), "Mobile units are not stored")
+        rebuilt = compact.to_game_map(game.config)
+        for location in game.game_map:
+            expected = [(u.unit_type, u.player_index, u.health, u.upgraded, u.attackRange) for u in game.game_map[location] if u.stationary]
+            self.assertEqual(expected, [(u.unit_type, u.player_index, u.health, u.upgraded, u.attackRange) for u in rebuilt[location]])
+
+        copied = compact.copy()
+        self.assertEqual(compact, copied)
+        self.assertEqual(1, len({compact, copied, CompactBoard.from_game_map(rebuilt)}), "Equal boards should hash the same")
+        copied.clear(board.cell_id(13, 13))
+        self.assertNotEqual(compact, copied)
+        self.assertIsNotNone(compact.get([13, 13]), "Copies should not share their buffer")
+
+    def test_board_diff(self):
+        from .board_diff import BoardDiff
+        game = self.make_turn_0_map()
+        for location, unit_type, player_index in [([3, 13], "FF", 0), ([4, 13], "DF", 0), ([10, 14], "FF", 1), ([11, 14], "DF", 1), ([12, 14], "FF", 1)]:
+            game.game_map.add_unit(unit_type, location, player_index)
+        first = BoardDiff(None, game)
+        self.assertEqual({(3, 13), (4, 13)}, first.added[0])
+        self.assertEqual({(10, 14), (11, 14), (12, 14)}, first.added[1])
+
+        later = game.clone()
+        later.game_map.remove_unit([3, 13])
+        later.game_map.upgrade_unit([4, 13])
+        later.game_map[11, 14][0].health -= 20
+        later.game_map.remove_unit([10, 14])
+        later.game_map.add_unit("DF", [10, 14], 1)
+        later.game_map.add_unit("EF", [13, 14], 1)
+        diff = BoardDiff(first.board, later)
+        self.assertEqual((set(), {(10, 14), (13, 14)}), diff.added)
+        self.assertEqual(({(3, 13)}, {(10, 14)}), diff.removed)
+        self.assertEqual(({(4, 13)}, set()), diff.upgraded)
+        self.assertEqual(({}, {(11, 14): 20}), diff.damaged)
+        self.assertFalse(BoardDiff(later, diff.board).changed(1), "An unchanged board has no diff")
+
+    def test_zobrist_hash(self):
+        from .zobrist import ZobristHash, TranspositionCache
+        from .simulation import Simulation
+        game = self.make_random_walls(self.make_turn_0_map(), 9, count=60)
+        start = game.zobrist.value()
+        game.game_map.add_unit("DF", [13, 13], 0)
+        game.game_map.upgrade_unit([13, 13])
+        game.game_map[13, 13][0].health = 10
+        self.assertNotEqual(start, game.zobrist.value())
+        self.assertEqual(ZobristHash(game.game_map).value(), ZobristHash(game.clone().game_map).value())
+        game.game_map.remove_unit([13, 13])
+        self.assertEqual(start, game.zobrist.value(), "Removing a structure should undo adding it, even after its health changed")
+        game.game_map[13, 13] = [GameUnit("DF", game.config, 0)]
+        self.assertNotEqual(start, game.zobrist.value(), "Setting a location should change the hash")
+        self.assertEqual(ZobristHash(game.game_map).value(), game.zobrist.value())
+        game.game_map[13, 13] = []
+        self.assertEqual(start, game.zobrist.value(), "Emptying a location should undo setting it")
+
+        cache = TranspositionCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(["a", "c"], [key for key in ("a", "b", "c") if key in cache], "The least recently used entry should be dropped")
+
+        cache = TranspositionCache()
+        expected = Simulation(game).best_attack_path(None, 5, "PI", 0)
+        self.assertEqual(expected, Simulation(game, cache=cache).best_attack_path(None, 5, "PI", 0))
+        sim = Simulation(game.clone(), cache=cache)
+        sim.simulate_path_steps = None
+        self.assertEqual(expected, sim.best_attack_path(None, 5, "PI", 0), "An unchanged board should be answered from the cache")
+
+    def test_unit_group(self):
+        from .simulation import Simulation, UnitGroup
+        game = self.make_turn_0_map()
+        rng = random.Random(0)
+        for _ in range(50):
+            count = rng.randint(1, 30)
+            group = UnitGroup(GameUnit("PI", game.config, 0, None, 13, 0), count)
+            units = [15.0] * count
+            for _ in range(10):
+                damage = rng.choice([0, 2.0, 6.0, 15.0, 40.0])
+                group.take_damage(damage)
+                while damage > 0 and units:
+                    if units[-1] > damage:
+                        units[-1] -= damage
+                        break
+                    damage -= units.pop()
+            self.assertEqual(len(units), group.count)
+            if units:
+                self.assertEqual(units[-1], group.last_health)
+                self.assertTrue(all(health == group.health for health in units[:-1]))
+
+        game.game_map.add_unit("DF", [13, 3], 1)
+        sim = Simulation(game)
+        _, damage_given, damage_taken, breaches = sim.simulate_path([13, 0], 30, "PI", 0)
+        self.assertEqual(30, breaches, "One destructor should not stop 30 pings")
+        self.assertGreater(damage_taken, 0)
+        self.assertEqual(90, game.game_map[13, 3][0].health, "The simulated board should not be modified")
+        self.assertEqual(0, sum(len(game.game_map[location]) for location in game.game_map if not game.contains_stationary_unit(location)))
+
+    def test_combat_simulator(self):
+        from .combat import CombatSimulator
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0])
+        result = CombatSimulator(game).simulate([("PI", [13, 0], 0, 3), ("EI", [14, 0], 0, 1)])
+        self.assertEqual([4, 0], result['breaches'], "Every unit should reach the edge of an empty board")
+        self.assertEqual(2 * len(path), result['frames'], "Slower units should take one frame per 1/speed to score")
+
+        game.game_map.add_unit("DF", [13, 3], 1)
+        game.game_map.add_unit("FF", [12, 5], 1)
+        result = CombatSimulator(game).simulate([("PI", [13, 0], 0, 1)])
+        self.assertGreater(result['damage_taken'][0], 0, "The destructor should shoot the ping")
+        self.assertGreater(result['structure_damage'][0], 0, "The ping should shoot back")
+        self.assertEqual(1, len(game.game_map[13, 3]), "The simulated board should not be modified")
+        self.assertEqual(90, game.game_map[13, 3][0].health)
+
+    def test_shield_amount(self):
+        import copy
+        from .combat import CombatSimulator
+        from .simulation import Simulation
+        config = copy.deepcopy(self.make_turn_0_map().config)
+        config["unitInformation"][1].update(shieldRange=3.5, shieldPerUnit=2.0, shieldBonusPerY=0.5)
+        game = GameState(config, self.make_turn_0_map().serialized_string)
+        game.suppress_warnings(True)
+        game.game_map.add_unit("EF", [13, 5], 0)
+        game.game_map.add_unit("EF", [14, 22], 1)
+        self.assertEqual(4.5, game.game_map[13, 5][0].shield_amount())
+        self.assertEqual(4.5, game.game_map[14, 22][0].shield_amount(), "The bonus should count rows from the owner's own edge")
+        combat = CombatSimulator(game)
+        self.assertEqual((4.5, 4.5), (combat.s_shield[board.cell_id(13, 5)], combat.s_shield[board.cell_id(14, 22)]))
+
+        for frame_accurate in (False, True):
+            sim = Simulation(game, frame_accurate=frame_accurate)
+            self.assertEqual(-2 * 4.5, sim.simulate_path([13, 0], 2, "PI", 0)[2])
+            self.assertEqual(-3 * 4.5, sim.simulate_path([14, 27], 3, "PI", 1)[2], "Both simulators should shield the enemy's units the same way")
+
     def test_print_unit(self):
         game = self.make_turn_0_map()
 
@@ -0,0 +1,150 @@
+from . import board
+
+# Cells covered by a structure, keyed by (x, y, attackRange, max range, getHitRadius)
+_COVERAGE = {}
+
+
+class ThreatMap:
+    """Tracks, for every location, the structures that would attack a mobile unit standing there
+
+    The map is built from the GameMap the first time it is queried, and from then on it is kept up
+    to date as structures are added, removed or upgraded through the GameMap. Structures changed by
+    editing the lists returned by game_map[x, y] directly are not seen.
+    Mobile units are not tracked, use GameState.get_attackers to include them.
+
+    Attributes :
+        * game_map (:obj: GameMap): The map whose structures are tracked
+
+    """
+    def __init__(self, game_map):
+        self.game_map = game_map
+        self._built = False
+        self._damage = None
+        self._attackers = None
+        self._max_range = game_map.catalog.max_attack_range
+        self._hit_radius = game_map.catalog.hit_radius
+        game_map.add_structure_listener(self)
+
+    def build(self):
+        """Builds the threat map now rather than on the first query. Does nothing if it is already built.
+        """
+        if self._built:
+            return
+        self._built = True
+        # Indexed by the defending player, then by cell id
+        self._damage = [[0] * board.CELL_COUNT, [0] * board.CELL_COUNT]
+        self._attackers = [[[] for _ in range(board.CELL_COUNT)], [[] for _ in range(board.CELL_COUNT)]]
+        for x, y in board.CELLS:
+            for unit in self.game_map[x, y]:
+                if unit.stationary:
+                    self.structure_added(unit)
+
+    def _covered_cells(self, unit):
+        """The cell ids within the attack range of a structure
+        """
+        key = (unit.x, unit.y, unit.attackRange, self._max_range, self._hit_radius)
+        cells = _COVERAGE.get(key)
+        if cells is None:
+            location = [unit.x, unit.y]
+            cells = _COVERAGE[key] = tuple(
+                board.cell_id(covered[0], covered[1])
+                for covered in self.game_map.get_locations_in_range(location, self._max_range)
+                if self.game_map.distance_between_locations(location, covered) <= unit.attackRange)
+        return cells
+
+    def structure_added(self, unit):
+        """Called by GameMap when a structure is placed
+        """
+        if not self._built or unit.damage_i + unit.damage_f <= 0:
+            return
+        defender = 1 - unit.player_index
+        damage = self._damage[defender]
+        attackers = self._attackers[defender]
+        order = (unit.x, unit.y)
+        attacker_cell = board.cell_id(unit.x, unit.y)
+        for cell in self._covered_cells(unit):
+            damage[cell] += unit.damage_i
+            # Keep attackers in the order GameState.get_attackers finds them, by x then y
+            cell_attackers = attackers[cell]
+            index = len(cell_attackers)
+            while index > 0 and board.CELLS[cell_attackers[index - 1]] > order:
+                index -= 1
+            cell_attackers.insert(index, attacker_cell)
+
+    def structure_removed(self, unit):
+        """Called by GameMap when a structure is removed
+        """
+        if not self._built or unit.damage_i + unit.damage_f <= 0:
+            return
+        defender = 1 - unit.player_index
+        damage = self._damage[defender]
+        attackers = self._attackers[defender]
+        attacker_cell = board.cell_id(unit.x, unit.y)
+        for cell in self._covered_cells(unit):
+            damage[cell] -= unit.damage_i
+            attackers[cell].remove(attacker_cell)
+
+    def copy(self, game_map):
+        """Creates a threat map for a copy of this map, without rebuilding it
+
+        Args:
+            game_map: A copy of this threat map's GameMap, made with GameMap.copy
+
+        Returns:
+            A ThreatMap tracking game_map
+
+        """
+        threat_map = ThreatMap(game_map)
+        if self._built:
+            threat_map._built = True
+            threat_map._damage = [list(damage) for damage in self._damage]
+            threat_map._attackers = [[list(cell_attackers) for cell_attackers in attackers] for attackers in self._attackers]
+        return threat_map
+
+    def get_attackers(self, location, player_index):
+        """Gets the structures threatening a given location
+
+        Args:
+            location: The location of a hypothetical defender
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A list of structures that would attack a unit controlled by the given player at the given location
+
+        """
+        self.build()
+        attackers = []
+        for cell in self._attackers[player_index][board.cell_id(location[0], location[1])]:
+            for unit in self.game_map[board.CELLS[cell]]:
+                if unit.stationary:
+                    attackers.append(unit)
+        return attackers
+
+    def get_damage(self, location, player_index):
+        """Gets the total damage per frame structures deal to a mobile unit at a given location
+
+        Args:
+            location: The location of a hypothetical defender
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            The sum of damage_i of all structures attacking the location
+
+        """
+        self.build()
+        return self._damage[player_index][board.cell_id(location[0], location[1])]
+
+    def get_path_damage(self, path, player_index):
+        """Gets the total damage structures deal to a mobile unit along a path, one attack per location
+
+        Args:
+            path: A list of locations, like the ones returned by find_path_to_edge
+            player_index: The index corresponding to the player controlling the mobile unit
+
+        Returns:
+            The sum of get_damage over the path
+
+        """
+        self.build()
+        damage = self._damage[player_index]
+        return sum(damage[board.cell_id(x, y)] for x, y in path)
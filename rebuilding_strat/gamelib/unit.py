@@ -1,3 +1,7 @@
+from . import board
+from .catalog import UnitCatalog
+
+
 def is_stationary(unit_type, structure_types):
     """
         Args:
@@ -15,6 +19,7 @@ class GameUnit:
     Attributes :
         * unit_type (string): This unit's type
         * config (JSON): Contains information about the game
+        * catalog (:obj: UnitCatalog): The unit types of the config
         * player_index (integer): The player that controls this unit. 0 for you, 1 for your opponent.
         * x (integer): The x coordinate of the unit
         * y (integer): The y coordinate of the unit
@@ -31,50 +36,66 @@ class GameUnit:
         * pending_removal (boolean): If this unit is marked for removal by its owner
         * upgraded (boolean): If this unit is upgraded
 
+    The stats of each unit type come from the UnitCatalog of the config, so creating a unit only copies them.
+
     """
-    def __init__(self, unit_type, config, player_index=None, health=None, x=-1, y=-1):
-        """ Initialize unit variables using args passed
+    __slots__ = ("unit_type", "config", "catalog", "player_index", "pending_removal", "upgraded", "x", "y", "health",
+                 "stationary", "speed", "damage_f", "damage_i", "attackRange", "shieldRange", "max_health",
+                 "shieldPerUnit", "shieldBonusPerY", "cost")
+
+    def __init__(self, unit_type, config, player_index=None, health=None, x=-1, y=-1, catalog=None):
+        """ Initialize unit variables using args passed. The catalog is looked up from the config if it is not given
 
         """
+        if catalog is None:
+            catalog = UnitCatalog.for_config(config)
         self.unit_type = unit_type
         self.config = config
+        self.catalog = catalog
         self.player_index = player_index
         self.pending_removal = False
         self.upgraded = False
         self.x = x
         self.y = y
-        self.__serialize_type()
+        self.__set_stats(catalog.stats[unit_type, False])
         self.health = self.max_health if not health else health
 
-    def __serialize_type(self):
-        from .game_state import STRUCTURE_TYPES, UNIT_TYPE_TO_INDEX, SUPPORT
-        type_config = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[self.unit_type]]
-        self.stationary = type_config["unitCategory"] == 0
-        self.speed = type_config.get("speed", 0)
-        self.damage_f = type_config.get("attackDamageTower", 0)
-        self.damage_i = type_config.get("attackDamageWalker", 0)
-        self.attackRange = type_config.get("attackRange", 0)
-        self.shieldRange = type_config.get("shieldRange", 0)
-        self.max_health = type_config.get("startHealth", 0)
-        self.shieldPerUnit = type_config.get("shieldPerUnit", 0)
-        self.shieldBonusPerY = type_config.get("shieldBonusPerY", 0)
-        self.cost = [type_config.get("cost1", 0), type_config.get("cost2", 0)]
-
+    def __set_stats(self, stats):
+        (self.stationary, self.speed, self.damage_f, self.damage_i, self.attackRange, self.shieldRange,
+         self.max_health, self.shieldPerUnit, self.shieldBonusPerY, cost) = stats
+        self.cost = list(cost)
 
     def upgrade(self):
-        from .game_state import UNIT_TYPE_TO_INDEX
-        type_config = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[self.unit_type]].get("upgrade", {})
-        self.speed = type_config.get("speed", self.speed)
-        self.damage_f = type_config.get("attackDamageTower", self.damage_f)
-        self.damage_i = type_config.get("attackDamageWalker", self.damage_i)
-        self.attackRange = type_config.get("attackRange", self.attackRange)
-        self.shieldRange = type_config.get("shieldRange", self.shieldRange)
-        self.max_health = type_config.get("startHealth", self.max_health)
-        self.shieldPerUnit = type_config.get("shieldPerUnit", self.shieldPerUnit)
-        self.shieldBonusPerY = type_config.get("shieldBonusPerY", self.shieldBonusPerY)
-        self.cost = [type_config.get("cost1", 0) + self.cost[0], type_config.get("cost2", 0) + self.cost[1]]
+        self.__set_stats(self.catalog.stats[self.unit_type, True])
         self.upgraded = True
 
+    def shield_amount(self):
+        """The shield this support gives each friendly mobile unit in range
+
+        The bonus grows with the rows between the support and its owner's own edge,
+        so y for player 0 and ARENA_SIZE - 1 - y for player 1.
+
+        """
+        rows_forward = self.y if self.player_index == 0 else board.ARENA_SIZE - 1 - self.y
+        return self.shieldPerUnit + self.shieldBonusPerY * rows_forward
+
+    def __copy__(self):
+        unit = GameUnit.__new__(GameUnit)
+        unit.unit_type = self.unit_type
+        unit.config = self.config
+        unit.catalog = self.catalog
+        unit.player_index = self.player_index
+        unit.pending_removal = self.pending_removal
+        unit.upgraded = self.upgraded
+        unit.x = self.x
+        unit.y = self.y
+        unit.health = self.health
+        (unit.stationary, unit.speed, unit.damage_f, unit.damage_i, unit.attackRange, unit.shieldRange,
+         unit.max_health, unit.shieldPerUnit, unit.shieldBonusPerY) = (
+            self.stationary, self.speed, self.damage_f, self.damage_i, self.attackRange, self.shieldRange,
+            self.max_health, self.shieldPerUnit, self.shieldBonusPerY)
+        unit.cost = list(self.cost)
+        return unit
 
     def __toString(self):
         owner = "Friendly" if self.player_index == 0 else "Enemy"
@@ -1,5 +1,12 @@
+import json
 import sys
 
+try:
+    # orjson decodes several times faster than the standard library, use it when it is installed
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 
 BANNER_TEXT = "---------------- Starting Your Algo --------------------"
 
@@ -39,3 +46,79 @@ def debug_write(*msg):
     #Printing to STDERR is okay and printed out by the game but doesn't effect turns.
     sys.stderr.write(", ".join(map(str, msg)).strip() + "\n")
     sys.stderr.flush()
+
+
+class ParsedMessage(str):
+    """A message from the game engine, decoded once when it arrives
+
+    It is still the raw string, so code expecting the string keeps working, 
+    and the decoded json is kept in the state attribute for everything that needs it.
+    The decoded state is shared, so treat it as read only.
+
+    Attributes :
+        * state (dict): The decoded json of the message
+
+    """
+    def __new__(cls, message):
+        parsed = super().__new__(cls, message)
+        parsed.state = json_loads(message)
+        return parsed
+
+def decode_message(message):
+    """Gets the decoded json of a message from the game engine
+
+    Args:
+        message: A ParsedMessage, or a plain json string
+
+    Returns:
+        The decoded state, without decoding it again if message is a ParsedMessage
+
+    """
+    if isinstance(message, ParsedMessage):
+        return message.state
+    return json_loads(message)
+
+def peek_turn_type(message):
+    """Reads the type of a game state message without decoding it
+
+    Args:
+        message: A json string from the game engine
+
+    Returns:
+        The first entry of turnInfo, 0 for a turn, 1 for an action frame and 2 for the end of the game. 
+        None if the message has no turnInfo
+
+    """
+    start = message.find('"turnInfo"')
+    if start < 0:
+        return None
+    start = message.find('[', start)
+    end = message.find(',', start)
+    try:
+        return int(message[start + 1:end])
+    except ValueError:
+        return None
+
+def has_events(message, event_types):
+    """Checks if an action frame holds any events of the given types without decoding it
+
+    Args:
+        message: An action frame json string from the game engine
+        event_types: Names of event lists in the frame's events, like "breach" or "death"
+
+    Returns:
+        True if any of the event lists is not empty
+
+    """
+    for event_type in event_types:
+        key = '"{}"'.format(event_type)
+        start = message.find(key)
+        if start < 0:
+            continue
+        rest = message[start + len(key):start + len(key) + 16].lstrip()
+        if not rest.startswith(':'):
+            return True
+        rest = rest[1:].lstrip()
+        if not rest.startswith('[') or not rest[1:].lstrip().startswith(']'):
+            return True
+    return False
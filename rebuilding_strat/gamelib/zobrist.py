@@ -0,0 +1,141 @@
+import random
+from collections import OrderedDict
+
+from . import board
+
+# One random 64 bit key per cell, owner, structure type and upgraded flag. Seeded so hashes are the same in every process
+_MAX_TYPES = 8
+_RANDOM = random.Random(20240611)
+_KEYS = tuple(_RANDOM.getrandbits(64) for _ in range(board.CELL_COUNT * 2 * _MAX_TYPES * 2))
+_MASK = (1 << 64) - 1
+
+
+class ZobristHash:
+    """A hash of the structures on a GameMap, kept up to date as they change
+
+    The hash is the xor of one key per structure, made from its cell, owner, type, upgraded flag and health,
+    so adding, removing or upgrading a structure updates it in constant time. Like ThreatMap, it is built from
+    the map on first use and then follows the changes made through GameMap.add_unit, remove_unit and upgrade_unit.
+    Changes made by editing units directly, such as setting their health, are not seen.
+    Mobile units are not part of the hash.
+
+    Attributes :
+        * game_map (:obj: GameMap): The map whose structures are hashed
+
+    """
+    def __init__(self, game_map):
+        self.game_map = game_map
+        self._built = False
+        self._value = 0
+        self._cell_keys = None
+        game_map.add_structure_listener(self)
+
+    def build(self):
+        """Hashes the map now rather than on first use. Does nothing if it is already built.
+        """
+        if self._built:
+            return
+        self._built = True
+        self._value = 0
+        self._cell_keys = [0] * board.CELL_COUNT
+        for x, y in board.CELLS:
+            for unit in self.game_map[x, y]:
+                if unit.stationary:
+                    self.structure_added(unit)
+
+    def _key(self, cell, unit):
+        type_id = self.game_map.catalog.UNIT_TYPE_TO_INDEX[unit.unit_type]
+        key = _KEYS[((cell * 2 + unit.player_index) * _MAX_TYPES + type_id) * 2 + unit.upgraded]
+        # Health has too many possible values for a table, so mix in the hash of the float instead
+        return key ^ (hash((cell, unit.health)) & _MASK)
+
+    def structure_added(self, unit):
+        """Called by GameMap when a structure is placed
+        """
+        if not self._built:
+            return
+        cell = board.cell_id(unit.x, unit.y)
+        # Remember the key, the unit's health may change before it is removed
+        key = self._cell_keys[cell] = self._key(cell, unit)
+        self._value ^= key
+
+    def structure_removed(self, unit):
+        """Called by GameMap when a structure is removed
+        """
+        if not self._built:
+            return
+        cell = board.cell_id(unit.x, unit.y)
+        self._value ^= self._cell_keys[cell]
+        self._cell_keys[cell] = 0
+
+    def copy(self, game_map):
+        """Creates a hash for a copy of this map, without rehashing it
+
+        Args:
+            game_map: A copy of this hash's GameMap, made with GameMap.copy
+
+        Returns:
+            A ZobristHash tracking game_map
+
+        """
+        zobrist = ZobristHash(game_map)
+        if self._built:
+            zobrist._built = True
+            zobrist._value = self._value
+            zobrist._cell_keys = list(self._cell_keys)
+        return zobrist
+
+    def value(self):
+        """The current hash of the structures on the map
+        """
+        self.build()
+        return self._value
+
+
+class TranspositionCache:
+    """A least recently used cache of results keyed on board hashes
+
+    Keep one for the whole game, for example on the AlgoStrategy, and key results on
+    (ZobristHash.value(), query) so that queries repeated on an unchanged board, even on a
+    later turn, are answered without being recomputed.
+
+    Attributes :
+        * maxsize (int): The most results kept, the least recently used are dropped first
+        * hits (int): The number of lookups that found a result
+        * misses (int): The number of lookups that did not
+
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        """Gets the result stored for key, or default if there is none
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores a result, dropping the least recently used one if the cache is full
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()